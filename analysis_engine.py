@@ -1,34 +1,218 @@
-from groq import Groq
-from config import GROQ_API_KEY
-import json
+from typing import List, Optional
 
-client = Groq(api_key=GROQ_API_KEY)
+from pydantic import BaseModel, Field, ValidationError
 
+from json_stream import ObjectFieldStream, parse_partial_object
+from structured_log import get_logger
+from llm_scheduler import chat_completion, LLMQueueTimeout, ANALYSIS
+
+logger = get_logger("analysis")
+
+
+FILLER_WORDS = {"um", "uh", "umm", "uhh", "er", "hmm", "like", "basically", "actually", "literally"}
+FILLER_PHRASES = ["you know", "i mean", "sort of", "kind of"]
+# Shared with filler_engine and question_bank, which react to the same answers
+DONT_KNOW_PHRASES = [
+    "don't know", "dont know", "do not know", "not sure", "no idea",
+    "can't remember", "cannot remember", "don't remember", "not familiar",
+]
+
+SCORE_FIELDS = ["technical_score", "communication_score", "confidence_score"]
+LIST_FIELDS = ["strengths", "weaknesses", "suggestions"]
+
+ANALYSIS_MODEL = "llama-3.1-8b-instant"
+ANALYSIS_MAX_TOKENS = 400
+# Points taken off every score when the candidate left before half the time
+EARLY_EXIT_PENALTY = 30
+# Average seconds from question to answer counted as long hesitation
+LONG_ANSWER_GAP = 45
+
+# Provider-side JSON mode (not available for streamed calls)
+JSON_MODE = {"type": "json_object"}
+
+
+class AnalysisFields(BaseModel):
+    """Schema for the LLM analysis. Every field is optional so each one can be validated on its own."""
+    technical_score: Optional[float] = Field(None, ge=0, le=100)
+    communication_score: Optional[float] = Field(None, ge=0, le=100)
+    confidence_score: Optional[float] = Field(None, ge=0, le=100)
+    strengths: Optional[List[str]] = Field(None, min_length=1)
+    weaknesses: Optional[List[str]] = Field(None, min_length=1)
+    suggestions: Optional[List[str]] = Field(None, min_length=1)
+
+
+# --------------------------------------------------
+# FEATURE EXTRACTION (no LLM)
+# --------------------------------------------------
+def extract_features(conversation, metadata=None):
+    """
+    Compute transcript statistics in one pass over the candidate answers.
+    Everything here is deterministic and feeds both the rules engine and
+    the LLM prompt.
+    """
+    metadata = metadata or {}
+
+    answers = [msg["content"] for msg in conversation if msg["role"] == "user"]
+    lowered = [a.lower() for a in answers]
+    tokens = [a.split() for a in lowered]
+    word_counts = [len(t) for t in tokens]
+
+    filler_counts = [
+        sum(1 for w in t if w.strip(",.!?") in FILLER_WORDS) + sum(a.count(p) for p in FILLER_PHRASES)
+        for t, a in zip(tokens, lowered)
+    ]
+    dont_know = [any(p in a for p in DONT_KNOW_PHRASES) for a in lowered]
+    substantive = [wc >= 10 and not dk for wc, dk in zip(word_counts, dont_know)]
+
+    answer_count = len(answers)
+    total_words = sum(word_counts)
+    gaps = [g for g in metadata.get("answer_gaps", []) if g is not None]
+
+    configured_duration = metadata.get("configured_duration", 300)
+    actual_duration = metadata.get("actual_duration", 0)
+
+    return {
+        "candidate_answer_count": answer_count,
+        "candidate_total_words": total_words,
+        "avg_words_per_answer": round(total_words / answer_count) if answer_count else 0,
+        "max_words_per_answer": max(word_counts, default=0),
+        "short_answer_ratio": round(sum(1 for wc in word_counts if wc < 5) / answer_count, 2) if answer_count else 0,
+        "substantive_answers": sum(substantive),
+        "dont_know_answers": sum(dont_know),
+        "filler_rate": round(sum(filler_counts) / total_words, 3) if total_words else 0,
+        "introduced": bool(word_counts) and word_counts[0] >= 5,
+        "intro_words": word_counts[0] if word_counts else 0,
+        "avg_answer_gap": round(sum(gaps) / len(gaps), 1) if gaps else None,
+        "max_answer_gap": max(gaps) if gaps else None,
+        "total_questions": metadata.get("total_questions", 0),
+        "configured_duration": configured_duration,
+        "actual_duration": actual_duration,
+        "duration_pct": round((actual_duration / configured_duration) * 100) if configured_duration > 0 else 0,
+        "early_exit": metadata.get("early_exit", False),
+    }
+
+
+# --------------------------------------------------
+# RULES ENGINE
+# --------------------------------------------------
+def score_caps(features, rules_only=False):
+    """
+    Upper bounds per score implied by the hard scoring rules.
+
+    A short first answer only caps a rules-only analysis; "Hi, I'm Priya
+    Sharma." is a fine introduction, so the LLM gets the introduction
+    length as a signal instead.
+    """
+    caps = {field: 100 for field in SCORE_FIELDS}
+
+    def cap_all(limit):
+        for field in SCORE_FIELDS:
+            caps[field] = min(caps[field], limit)
+
+    if features["candidate_answer_count"] < 3:
+        cap_all(29)
+    if features["avg_words_per_answer"] < 10:
+        caps["communication_score"] = min(caps["communication_score"], 24)
+    if rules_only and not features["introduced"]:
+        cap_all(14)
+
+    return caps
+
+
+def score_penalty(features):
+    """Points deducted from every score (after the LLM read, before the caps)."""
+    return EARLY_EXIT_PENALTY if features["early_exit"] else 0
+
+
+def is_decided_by_rules(features):
+    """Interviews too thin for an LLM read to change the outcome."""
+    count = features["candidate_answer_count"]
+    if count == 0 or features["substantive_answers"] == 0:
+        return True
+    return count < 3 and (features["early_exit"] or features["avg_words_per_answer"] < 10)
+
+
+def overall_score(result):
+    return round(
+        result["technical_score"] * 0.4
+        + result["communication_score"] * 0.3
+        + result["confidence_score"] * 0.3
+    )
+
+
+def enforce_caps(result, caps, penalty=0):
+    """Apply the rule penalty, clamp scores to the rule caps and recompute the weighted overall."""
+    for field in SCORE_FIELDS:
+        try:
+            value = int(round(float(result.get(field, 0))))
+        except (TypeError, ValueError):
+            value = 0
+        result[field] = max(0, min(value - penalty, caps[field]))
+    result["overall_score"] = overall_score(result)
+    return result
+
+
+def rules_only_analysis(features, caps):
+    """Deterministic analysis for interviews decided by the rules."""
+    count = features["candidate_answer_count"]
+    participation = min(1.0, count / 3)
+
+    result = {
+        "technical_score": features["substantive_answers"] * 8,
+        "communication_score": round(features["avg_words_per_answer"] * (1 - features["filler_rate"])),
+        "confidence_score": round(20 * participation * (1 - features["short_answer_ratio"] / 2)),
+    }
+    enforce_caps(result, caps, score_penalty(features))
+
+    strengths = []
+    if features["introduced"]:
+        strengths.append("Introduced themselves")
+    if features["substantive_answers"]:
+        strengths.append("Gave at least one substantive answer")
+    if not strengths:
+        strengths.append("Attempted the interview" if count else "None identified")
+
+    weaknesses = []
+    if count == 0:
+        weaknesses.append("Did not answer any questions")
+    elif count < 3:
+        weaknesses.append(f"Answered only {count} question{'s' if count != 1 else ''}")
+    if features["early_exit"]:
+        weaknesses.append(f"Left the interview early ({features['duration_pct']}% of the scheduled time)")
+    if count and features["avg_words_per_answer"] < 10:
+        weaknesses.append("Answers were very short")
+    if (features["avg_answer_gap"] or 0) >= LONG_ANSWER_GAP:
+        weaknesses.append("Took a long time to start answering")
+    if features["dont_know_answers"]:
+        weaknesses.append("Could not answer some questions")
+
+    suggestions = [
+        "Complete the full interview so your skills can be evaluated",
+        "Give complete answers with examples from your projects",
+    ]
+
+    result["strengths"] = strengths
+    result["weaknesses"] = weaknesses or ["Not enough responses to evaluate"]
+    result["suggestions"] = suggestions
+    return result
 
-def analyze_interview(conversation, metadata=None):
+
+def build_analysis_prompt(conversation, metadata, features, caps):
 
     transcript = ""
-    candidate_answer_count = 0
-    candidate_total_words = 0
 
     # -------- BUILD TRANSCRIPT --------
     for msg in conversation:
         role = "Interviewer" if msg["role"] == "assistant" else "Candidate"
         transcript += f"{role}: {msg['content']}\n"
-        if msg["role"] == "user":
-            candidate_answer_count += 1
-            candidate_total_words += len(msg["content"].split())
-
-    # -------- EXTRACT METADATA --------
-    total_questions = metadata.get("total_questions", 0) if metadata else 0
-    configured_duration = metadata.get("configured_duration", 300) if metadata else 300
-    actual_duration = metadata.get("actual_duration", 0) if metadata else 0
+
     candidate_name = metadata.get("name", "Candidate") if metadata else "Candidate"
-    was_early_exit = metadata.get("early_exit", False) if metadata else False
+    candidate_answer_count = features["candidate_answer_count"]
 
-    # Calculate completion percentage
-    duration_pct = round((actual_duration / configured_duration) * 100) if configured_duration > 0 else 0
-    avg_words_per_answer = round(candidate_total_words / candidate_answer_count) if candidate_answer_count > 0 else 0
+    if features["avg_answer_gap"] is None:
+        answer_gap = "not measured"
+    else:
+        answer_gap = f"{features['avg_answer_gap']} seconds on average, {features['max_answer_gap']} seconds at most"
 
     # -------- PROMPT --------
     prompt = f"""
@@ -36,11 +220,20 @@ You are a strict senior technical interviewer analyzing an interview.
 
 INTERVIEW METADATA:
 - Candidate: {candidate_name}
-- Total questions asked: {total_questions}
+- Total questions asked: {features['total_questions']}
 - Candidate answers given: {candidate_answer_count}
-- Average words per answer: {avg_words_per_answer}
-- Interview duration: {actual_duration} seconds out of {configured_duration} seconds ({duration_pct}% completed)
-- Early exit by candidate: {was_early_exit}
+- Average words per answer: {features['avg_words_per_answer']}
+- Substantive answers (10+ words, not "I don't know"): {features['substantive_answers']}
+- Filler-word rate: {features['filler_rate']}
+- Words in the first answer (introduction): {features['intro_words']}
+- Time from question to answer: {answer_gap}
+- Interview duration: {features['actual_duration']} seconds out of {features['configured_duration']} seconds ({features['duration_pct']}% completed)
+- Early exit by candidate: {features['early_exit']}
+
+HARD SCORE LIMITS (already computed from the rules below - never exceed them):
+- technical_score <= {caps['technical_score']}
+- communication_score <= {caps['communication_score']}
+- confidence_score <= {caps['confidence_score']}
 
 Evaluate the candidate ONLY based on the actual answers present in the transcript.
 
@@ -48,8 +241,8 @@ CRITICAL SCORING RULES:
 
 1. If the candidate answered fewer than 3 questions, ALL scores MUST be below 30.
 2. If the candidate gave only 1-word or very short answers (under 10 words average), communication score MUST be below 25.
-3. If the interview was ended early by the candidate (before 50% of time), reduce ALL scores by at least 30 points from what they would otherwise be.
-4. If the candidate could not even introduce themselves properly, ALL scores MUST be below 15.
+3. If the interview was ended early by the candidate (before 50% of time), {EARLY_EXIT_PENALTY} points are deducted from ALL scores automatically after your evaluation. Score the answers as given; do not deduct them yourself.
+4. Judge the introduction from the transcript. A short one ("Hi, I'm Priya Sharma.") is normal; only a candidate who could not introduce themselves at all should lose points for it.
 5. DO NOT give generous scores. Be strict and realistic.
 6. A score of 0-10 is acceptable for a candidate who barely participated.
 7. Empty or near-empty answers mean near-zero scores.
@@ -97,38 +290,208 @@ Interview Transcript:
 {transcript}
 """
 
-    # -------- GROQ CALL --------
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.1,
-        max_tokens=400
-    )
+    return prompt
+
+
+def fallback_analysis(features, caps):
+    """Low scores used when the LLM output can't be parsed - never generous (callers apply score_penalty)."""
+    candidate_answer_count = features["candidate_answer_count"]
+    fallback_score = min(20, candidate_answer_count * 5)  # Scale with answers given
+    return enforce_caps({
+        "technical_score": fallback_score,
+        "communication_score": fallback_score,
+        "confidence_score": fallback_score,
+        "overall_score": fallback_score,
+        "strengths": ["Attempted the interview"] if candidate_answer_count > 0 else ["None identified"],
+        "weaknesses": ["Analysis could not be completed - insufficient data"],
+        "suggestions": ["Complete more of the interview for a thorough evaluation"]
+    }, caps)
+
+
+# --------------------------------------------------
+# LLM OUTPUT PARSING + REPAIR
+# --------------------------------------------------
+def validate_fields(fields):
+    """Keep the analysis fields that pass AnalysisFields validation; drop the rest."""
+    valid = {}
+    for key in SCORE_FIELDS + LIST_FIELDS:
+        if key not in fields:
+            continue
+        try:
+            parsed = AnalysisFields.model_validate({key: fields[key]})
+        except ValidationError:
+            continue
+        valid[key] = getattr(parsed, key)
+    return valid
+
+
+def missing_fields(result):
+    return [key for key in SCORE_FIELDS + LIST_FIELDS if key not in result]
 
-    result_text = response.choices[0].message.content
 
-    # -------- SAFE JSON PARSING (IMPORTANT FIX) --------
+def failed_generation(error):
+    """Partial output the provider rejected in JSON mode (e.g. cut off at max_tokens), if any."""
+    body = getattr(error, "body", None)
+    if isinstance(body, dict):
+        body = body.get("error", body)
+        if isinstance(body, dict):
+            return body.get("failed_generation")
+    return None
+
+
+def request_json(messages, call_site, session_id, max_tokens):
+    """One JSON-mode analysis call. Returns the raw text, or the partial text when the provider rejected it."""
     try:
-        # Extract JSON part even if AI adds extra text
-        start = result_text.find("{")
-        end = result_text.rfind("}") + 1
+        response = chat_completion(
+            ANALYSIS, call_site, session_id,
+            model=ANALYSIS_MODEL,
+            messages=messages,
+            temperature=0.1,
+            max_tokens=max_tokens,
+            response_format=JSON_MODE
+        )
+    except LLMQueueTimeout:
+        raise
+    except Exception as e:
+        partial = failed_generation(e)
+        if partial is None:
+            raise
+        logger.warning("analysis json rejected by provider", extra={"stage": "analysis", "call_site": call_site, "error": str(e)})
+        return partial
+    return response.choices[0].message.content or ""
 
-        json_text = result_text[start:end]
 
-        return json.loads(json_text)
+def request_missing_fields(prompt, previous_text, missing, session_id):
+    """
+    Ask for only the fields that could not be recovered, reusing the first
+    answer as context so the scores stay consistent. Much shorter than
+    repeating the whole analysis.
+    """
+    messages = [{"role": "user", "content": prompt}]
+    if previous_text.strip():
+        messages.append({"role": "assistant", "content": previous_text})
+    messages.append({
+        "role": "user",
+        "content": (
+            "Your JSON was incomplete. Return ONLY a JSON object with these keys "
+            f"and nothing else: {', '.join(missing)}. Scores are numbers from 0 to 100, "
+            "the other keys are non-empty lists of short strings."
+        ),
+    })
+    max_tokens = sum(120 if key in LIST_FIELDS else 15 for key in missing)
 
+    try:
+        text = request_json(messages, "analyze_interview_missing", session_id, max_tokens)
     except Exception as e:
-        print("ANALYSIS PARSE ERROR:", e)
-        print("RAW AI RESPONSE:", result_text)
-
-        # fallback result (only if AI fails) - use low scores, not generous ones
-        fallback_score = min(20, candidate_answer_count * 5)  # Scale with answers given
-        return {
-            "technical_score": fallback_score,
-            "communication_score": fallback_score,
-            "confidence_score": fallback_score,
-            "overall_score": fallback_score,
-            "strengths": ["Attempted the interview"] if candidate_answer_count > 0 else ["None identified"],
-            "weaknesses": ["Analysis could not be completed - insufficient data"],
-            "suggestions": ["Complete more of the interview for a thorough evaluation"]
-        }
+        logger.warning("analysis re-request failed", extra={"stage": "analysis", "missing": missing, "error": str(e)})
+        return {}
+    recovered = validate_fields(parse_partial_object(text))
+    return {key: value for key, value in recovered.items() if key in missing}
+
+
+def analyze_interview(conversation, metadata=None):
+
+    # -------- FEATURES + RULES --------
+    features = extract_features(conversation, metadata)
+    caps = score_caps(features)
+
+    # Early-abandoned interviews are fully decided by the rules - skip the LLM
+    if is_decided_by_rules(features):
+        return rules_only_analysis(features, score_caps(features, rules_only=True))
+
+    prompt = build_analysis_prompt(conversation, metadata, features, caps)
+    session_id = (metadata or {}).get("session_id")
+
+    # -------- GROQ CALL (JSON mode) --------
+    try:
+        result_text = request_json(
+            [{"role": "user", "content": prompt}], "analyze_interview", session_id, ANALYSIS_MAX_TOKENS
+        )
+    except LLMQueueTimeout as e:
+        logger.warning("analysis degraded to fallback", extra={"stage": "analysis", "error": str(e)})
+        return enforce_caps(fallback_analysis(features, caps), caps, score_penalty(features))
+
+    # -------- TOLERANT PARSING --------
+    # Recovers truncated lists and ignores stray text; only fields that still
+    # fail validation are asked for again
+    result = validate_fields(parse_partial_object(result_text))
+    missing = missing_fields(result)
+    if missing:
+        logger.warning("analysis output incomplete", extra={"stage": "analysis", "missing": missing, "raw": result_text})
+        result.update(request_missing_fields(prompt, result_text, missing, session_id))
+
+    # Anything still missing gets the low fallback values, never generous ones
+    fallback = fallback_analysis(features, caps)
+    result = {key: result.get(key, fallback[key]) for key in SCORE_FIELDS + LIST_FIELDS}
+
+    return enforce_caps(result, caps, score_penalty(features))
+
+
+def analyze_interview_stream(conversation, metadata=None):
+    """
+    Same analysis as analyze_interview, but yields (field, value) pairs as
+    soon as each top-level field of the streamed LLM JSON is complete:
+    scores first, then strengths, weaknesses and suggestions.
+    Scores are clamped to the rule caps; overall_score is yielded once the
+    three component scores are known. Fields the stream didn't deliver are
+    re-requested once; whatever is still missing comes from the fallback.
+    """
+    features = extract_features(conversation, metadata)
+    caps = score_caps(features)
+
+    if is_decided_by_rules(features):
+        yield from rules_only_analysis(features, score_caps(features, rules_only=True)).items()
+        return
+
+    prompt = build_analysis_prompt(conversation, metadata, features, caps)
+    penalty = score_penalty(features)
+    parser = ObjectFieldStream()
+    emitted = {}
+
+    def accept(key, value):
+        if key in emitted:
+            return
+        valid = validate_fields({key: value})
+        if key not in valid:
+            return
+        value = valid[key]
+        if key in SCORE_FIELDS:
+            value = enforce_caps({**{f: 0 for f in SCORE_FIELDS}, key: value}, caps, penalty)[key]
+        emitted[key] = value
+        yield key, value
+        if all(f in emitted for f in SCORE_FIELDS) and "overall_score" not in emitted:
+            emitted["overall_score"] = overall_score(emitted)
+            yield "overall_score", emitted["overall_score"]
+
+    session_id = (metadata or {}).get("session_id")
+
+    try:
+        stream = chat_completion(
+            ANALYSIS, "analyze_interview_stream", session_id,
+            model=ANALYSIS_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.1,
+            max_tokens=ANALYSIS_MAX_TOKENS,
+            stream=True
+        )
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            for key, value in parser.feed(delta or ""):
+                yield from accept(key, value)
+    except Exception as e:
+        logger.error("analysis stream error", extra={"stage": "analysis", "error": str(e)})
+
+    # Salvage a list cut off at max_tokens, then ask only for what is missing
+    for key, value in parser.finish():
+        yield from accept(key, value)
+
+    missing = missing_fields(emitted)
+    if missing and parser.buffer:
+        for key, value in request_missing_fields(prompt, parser.buffer, missing, session_id).items():
+            yield from accept(key, value)
+
+    # Fill in anything the model didn't produce
+    fallback = fallback_analysis(features, caps)
+    for key in SCORE_FIELDS + LIST_FIELDS:
+        if key not in emitted:
+            yield from accept(key, fallback[key])
@@ -0,0 +1,105 @@
+"""
+Resident memory held by interview transcripts for many concurrent sessions.
+
+Compares the old representation (a list of {"role", "content"} dicts per
+session, answers stored untruncated) with conversation_store.Conversation
+(bounded in-memory window, older turns spilled to disk, answers capped at
+MAX_ANSWER_CHARS). A few sessions get a very long pasted answer.
+
+Usage:
+    python benchmarks/bench_conversation_memory.py [--sessions 10000] [--turns 24]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+SPILL_DIR = tempfile.mkdtemp(prefix="bench_conversations_")
+os.environ["CONVERSATION_DIR"] = SPILL_DIR
+
+from conversation_store import Conversation, truncate_answer  # noqa: E402
+
+
+def make_turns(turns, pasted_every, session_index, rng):
+    """Alternating question/answer turns; every `pasted_every`th session pastes a huge answer."""
+    result = []
+    for t in range(turns):
+        if t % 2 == 0:
+            content = "Can you explain how you would design a rate limiter for a public API? " * 2
+            result.append({"role": "assistant", "content": content})
+        else:
+            words = rng.randint(40, 120)
+            content = " ".join(rng.choice(("cache", "queue", "latency", "token", "bucket", "request")) for _ in range(words))
+            if pasted_every and session_index % pasted_every == 0 and t == 3:
+                content = content * 400
+            result.append({"role": "user", "content": content})
+    return result
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    held = build()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return held, current, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--turns", type=int, default=24)
+    parser.add_argument("--pasted-every", type=int, default=50)
+    args = parser.parse_args()
+
+    # Both runs generate the same transcripts (same seed) inside the measurement
+    def build_lists():
+        rng = random.Random(7)
+        sessions = {}
+        for i in range(args.sessions):
+            sessions[f"session_{i}"] = make_turns(args.turns, args.pasted_every, i, rng)
+        return sessions
+
+    def build_compact():
+        rng = random.Random(7)
+        sessions = {}
+        for i in range(args.sessions):
+            session_id = f"session_{i}"
+            conv = sessions[session_id] = Conversation(session_id)
+            for turn in make_turns(args.turns, args.pasted_every, i, rng):
+                if turn["role"] == "user":
+                    turn["content"] = truncate_answer(turn["content"])
+                conv.append(turn)
+        return sessions
+
+    try:
+        lists, list_bytes, list_peak, list_time = measure(build_lists)
+        del lists
+        compact, compact_bytes, compact_peak, compact_time = measure(build_compact)
+
+        # Reading one full transcript back (what /end does)
+        start = time.perf_counter()
+        full = compact["session_0"].to_list()
+        read_ms = (time.perf_counter() - start) * 1e3
+
+        spilled_bytes = sum(e.stat().st_size for e in os.scandir(SPILL_DIR))
+
+        print(f"{args.sessions} sessions x {args.turns} turns")
+        print(f"{'representation':<26}{'resident MB':>13}{'peak MB':>10}{'build s':>9}")
+        print(f"{'list of dicts':<26}{list_bytes / 1e6:>13.1f}{list_peak / 1e6:>10.1f}{list_time:>9.2f}")
+        print(f"{'Conversation (windowed)':<26}{compact_bytes / 1e6:>13.1f}{compact_peak / 1e6:>10.1f}{compact_time:>9.2f}")
+        print(f"per session: {list_bytes / args.sessions / 1e3:.1f} KB -> {compact_bytes / args.sessions / 1e3:.1f} KB")
+        print(f"spilled to disk: {spilled_bytes / 1e6:.1f} MB; full read of one transcript ({len(full)} turns): {read_ms:.2f} ms")
+    finally:
+        shutil.rmtree(SPILL_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Microbenchmarks for the pure-Python work done on every turn, with the LLM
+provider mocked out: abuse detection, question splitting, the "no
+questions" scan, feature extraction and transcript building for analysis,
+analysis JSON recovery, Answer parsing and a whole mocked /answer turn.
+Inputs include realistic and adversarial cases (10 KB answers, 400-turn
+conversations).
+
+Each case is timed with timeit (best of --repeat) and compared with the
+stored baseline; the run exits 1 if any case is slower than its baseline by
+more than --tolerance. Timings are machine specific, so baselines are kept
+per runner in benchmarks/baselines/<BENCH_RUNNER>.json (BENCH_RUNNER
+defaults to "default") and recorded on the machine that runs the check.
+
+BENCH_ROOT points the cases at another checkout (e.g. an older revision);
+cases whose code that checkout doesn't have are skipped.
+
+Usage:
+    python benchmarks/bench_hot_paths.py --save     # record this runner's baseline
+    python benchmarks/bench_hot_paths.py            # compare, exit 1 on regression
+    python benchmarks/bench_hot_paths.py --only abuse --only split
+    BENCH_ROOT=/tmp/base python benchmarks/bench_hot_paths.py --save --baseline /tmp/base.json
+"""
+import argparse
+import atexit
+import importlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import timeit
+from types import SimpleNamespace
+
+ROOT = os.environ.get("BENCH_ROOT") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+BASELINE_PATH = os.path.join(BASELINE_DIR, f"{os.environ.get('BENCH_RUNNER') or 'default'}.json")
+
+# Isolate the run: no real keys, quotas or caps, scratch storage, quiet logs
+SCRATCH = tempfile.mkdtemp(prefix="bench_hot_paths_")
+atexit.register(shutil.rmtree, SCRATCH, ignore_errors=True)
+os.environ.update({
+    "GROQ_API_KEY": os.environ.get("GROQ_API_KEY") or "bench",
+    "LLM_RPM": "1000000000",
+    "LLM_TPM": "1000000000000",
+    "SESSION_TOKEN_CAP": "1000000000",
+    "CLIENT_TOKEN_CAP": "1000000000",
+    "CLIENT_SESSION_CAP": "1000000000",
+    "CONVERSATION_DIR": os.path.join(SCRATCH, "conversations"),
+    "RESULTS_DB_PATH": os.path.join(SCRATCH, "results.db"),
+    "QUESTION_BANK_DIR": os.path.join(SCRATCH, "question_bank"),
+    "LOG_LEVEL": "ERROR",
+})
+
+
+def optional_import(name):
+    """Module `name`, or None if the checkout under test doesn't have it."""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+def attempt(fn):
+    """fn(), or None if the checkout under test can't run it."""
+    try:
+        return fn()
+    except Exception:
+        return None
+
+
+llm_scheduler = optional_import("llm_scheduler")
+interview_engine = optional_import("interview_engine")
+analysis_engine = optional_import("analysis_engine")
+json_stream = optional_import("json_stream")
+main_module = optional_import("main")
+
+
+# --------------------------------------------------
+# MOCK PROVIDER
+# --------------------------------------------------
+QUESTION_REPLY = (
+    "A hash map gives average constant time lookups because keys are spread across buckets. "
+    "Collisions are handled with chaining or open addressing.\n---\n"
+    "Mr. Sharma, how would you design a cache that evicts the least recently used entries?"
+)
+
+
+class FakeCompletions:
+    def create(self, **kwargs):
+        usage = SimpleNamespace(prompt_tokens=600, completion_tokens=60, total_tokens=660)
+        message = SimpleNamespace(content=QUESTION_REPLY)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+# Without llm_scheduler there is no client to mock, so the turn cases are skipped
+if llm_scheduler is not None:
+    llm_scheduler.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+
+
+# --------------------------------------------------
+# INPUTS
+# --------------------------------------------------
+# Vocabulary with no abuse-word or "no questions" substrings, so the scans
+# have to read the whole answer (their worst case)
+SAFE_WORDS = (
+    "the service writes every request to a queue and a worker reads it back "
+    "then we cache results in redis with a ttl to keep latency low under heavy traffic "
+    "i used python with fastapi for the api layer and postgres for storage"
+).split()
+
+
+def make_answer(chars):
+    words = []
+    size = 0
+    i = 0
+    while size < chars:
+        word = SAFE_WORDS[i % len(SAFE_WORDS)]
+        words.append(word)
+        size += len(word) + 1
+        i += 1
+    return " ".join(words)[:chars]
+
+
+SHORT_ANSWER = make_answer(400)
+LONG_ANSWER = make_answer(10_000)
+
+# Many short sentences before the question - the repeat extraction splits on '.'
+LONG_QUESTION_REPLY = ". ".join(["Caching trades memory for speed"] * 300) + ".\n---\nWhat would you cache first?"
+
+
+def make_conversation(turns, answer):
+    conversation = []
+    for i in range(turns):
+        if i % 2 == 0:
+            conversation.append({"role": "assistant", "content": QUESTION_REPLY})
+        else:
+            conversation.append({"role": "user", "content": answer})
+    return conversation
+
+
+CONVERSATION_20 = make_conversation(20, SHORT_ANSWER)
+CONVERSATION_400 = make_conversation(400, SHORT_ANSWER)
+CONVERSATION_10KB = make_conversation(40, LONG_ANSWER)
+
+ANALYSIS_METADATA = {"name": "Asha Sharma", "total_questions": 10, "configured_duration": 600, "actual_duration": 580}
+FEATURES_400 = attempt(lambda: analysis_engine.extract_features(CONVERSATION_400, ANALYSIS_METADATA))
+CAPS_400 = attempt(lambda: analysis_engine.score_caps(FEATURES_400))
+
+ANALYSIS_OUTPUT = json.dumps({
+    "technical_score": 72, "communication_score": 64, "confidence_score": 58, "overall_score": 66,
+    "strengths": ["Explained caching trade-offs clearly", "Good grasp of queues"],
+    "weaknesses": ["Vague on failure handling", "Did not quantify latency"],
+    "suggestions": ["Describe retries and idempotency", "Bring numbers from past projects"],
+})
+ANALYSIS_OUTPUT_TRUNCATED = "Here is the JSON: " + ANALYSIS_OUTPUT[:-40]
+
+ANSWER_BODY = json.dumps({"session_id": "session_1700000000_abcdef12", "text": SHORT_ANSWER})
+ANSWER_BODY_10KB = json.dumps({"session_id": "session_1700000000_abcdef12", "text": LONG_ANSWER})
+
+
+def validate_answer(body):
+    Answer = main_module.Answer
+    if hasattr(Answer, "model_validate_json"):
+        return Answer.model_validate_json(body)
+    return Answer.parse_raw(body)
+
+
+def mocked_turn(answer):
+    """start_session + one process_answer through the mocked LLM."""
+    if llm_scheduler is None:
+        raise RuntimeError("no mockable LLM client")
+    turn = interview_engine.start_session("Asha Sharma", "Backend Engineering", "10", client_id="bench")
+    session_id = turn["session_id"]
+    interview_engine.process_answer(session_id, answer)
+    interview_engine.delete_session(session_id)
+
+
+# --------------------------------------------------
+# CASES
+# --------------------------------------------------
+CASES = {
+    "abuse/short": lambda: interview_engine.detect_abuse(SHORT_ANSWER),
+    "abuse/10kb": lambda: interview_engine.detect_abuse(LONG_ANSWER),
+    "no_questions/short": lambda: interview_engine.candidate_has_no_questions(SHORT_ANSWER),
+    "no_questions/10kb": lambda: interview_engine.candidate_has_no_questions(LONG_ANSWER),
+    "split/typical": lambda: interview_engine.split_question(QUESTION_REPLY),
+    "split/300_sentences": lambda: interview_engine.split_question(LONG_QUESTION_REPLY),
+    "features/20_turns": lambda: analysis_engine.extract_features(CONVERSATION_20, ANALYSIS_METADATA),
+    "features/400_turns": lambda: analysis_engine.extract_features(CONVERSATION_400, ANALYSIS_METADATA),
+    "features/10kb_answers": lambda: analysis_engine.extract_features(CONVERSATION_10KB, ANALYSIS_METADATA),
+    "transcript/400_turns": lambda: analysis_engine.build_analysis_prompt(
+        CONVERSATION_400, ANALYSIS_METADATA, FEATURES_400, CAPS_400
+    ),
+    "analysis_parse/complete": lambda: json_stream.parse_partial_object(ANALYSIS_OUTPUT),
+    "analysis_parse/truncated": lambda: json_stream.parse_partial_object(ANALYSIS_OUTPUT_TRUNCATED),
+    "answer_model/short": lambda: validate_answer(ANSWER_BODY),
+    "answer_model/10kb": lambda: validate_answer(ANSWER_BODY_10KB),
+    "turn/mocked_llm": lambda: mocked_turn(SHORT_ANSWER),
+    "turn/mocked_llm_10kb": lambda: mocked_turn(LONG_ANSWER),
+}
+
+
+def measure(fn, repeat):
+    """Best per-call time in microseconds over `repeat` autoranged runs."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", action="append", default=[], help="run cases whose name starts with this")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file to write or compare with")
+    args = parser.parse_args()
+
+    names = [n for n in CASES if not args.only or any(n.startswith(prefix) for prefix in args.only)]
+    results = {}
+    for name in names:
+        # One untimed call: cases the checkout under test lacks are skipped
+        try:
+            CASES[name]()
+        except Exception as e:
+            print(f"{name:<28}skipped ({type(e).__name__}: {e})")
+            continue
+        results[name] = measure(CASES[name], args.repeat)
+
+    if args.save:
+        baseline = load_baseline(args.baseline) or {}
+        cases = baseline.get("cases", {})
+        cases.update({name: round(us, 3) for name, us in results.items()})
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "cases": cases}, f, indent=2)
+            f.write("\n")
+        for name, us in results.items():
+            print(f"{name:<28}{us:>12.2f} us")
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"no baseline at {args.baseline}; run with --save first")
+        return 2
+
+    if (baseline.get("python"), baseline.get("machine")) != (platform.python_version(), platform.machine()):
+        print(f"warning: baseline recorded on python {baseline.get('python')} / {baseline.get('machine')}")
+
+    regressions = []
+    print(f"{'case':<28}{'baseline us':>13}{'now us':>12}{'change':>9}")
+    for name, us in results.items():
+        base = baseline["cases"].get(name)
+        if base is None:
+            print(f"{name:<28}{'-':>13}{us:>12.2f}{'new':>9}")
+            continue
+        change = us / base - 1
+        flag = ""
+        if change > args.tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<28}{base:>13.2f}{us:>12.2f}{change:>+9.0%}{flag}")
+
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"all cases within {args.tolerance:.0%} of baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Per-call logging overhead on the request path, with a healthy sink and with
+a sink that stalls (e.g. a blocked stdout pipe).
+
+structured_log should cost the same in both cases - records are dropped once
+the queue is full instead of blocking the caller. A synchronous print() to
+the same stalled sink is shown for comparison.
+
+Usage:
+    python benchmarks/bench_logging.py [--calls 20000]
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import structured_log  # noqa: E402
+
+
+class NullSink(io.StringIO):
+    def write(self, text):
+        return len(text)
+
+
+class StalledSink(io.StringIO):
+    """Every write blocks until released - a reader that stopped reading."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.release.wait()
+        return len(text)
+
+
+def measure(log_call, calls):
+    samples = []
+    for i in range(calls):
+        start = time.perf_counter()
+        log_call(i)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "mean_us": statistics.fmean(samples) * 1e6,
+        "p50_us": samples[len(samples) // 2] * 1e6,
+        "p99_us": samples[int(len(samples) * 0.99)] * 1e6,
+        "max_us": samples[-1] * 1e6,
+    }
+
+
+def run_structured(sink, calls, queue_size):
+    structured_log.setup_logging(stream=sink, level="DEBUG", queue_size=queue_size)
+    logger = structured_log.get_logger("bench")
+
+    def log_call(i):
+        logger.info("generated question", extra={"session_id": f"session_{i % 64}", "stage": "technical", "raw": "x" * 80})
+
+    dropped_before = structured_log.log_stats()["dropped"]
+    result = measure(log_call, calls)
+    result["dropped"] = structured_log.log_stats()["dropped"] - dropped_before
+    return result
+
+
+def run_print_stalled(calls, timeout=2.0):
+    """Synchronous print() into a stalled sink - stops after `timeout` seconds."""
+    sink = StalledSink()
+    done = threading.Event()
+    result = {}
+
+    def worker():
+        start = time.perf_counter()
+        count = 0
+        while count < calls and time.perf_counter() - start < timeout:
+            print("DEBUG: Raw AI response:", "x" * 80, file=sink)
+            count += 1
+        result["count"] = count
+        result["elapsed"] = time.perf_counter() - start
+        done.set()
+
+    threading.Thread(target=worker, daemon=True).start()
+    blocked = not done.wait(timeout)
+    sink.release.set()
+    done.wait()
+    return blocked
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--queue-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    healthy = run_structured(NullSink(), args.calls, args.queue_size)
+
+    stalled_sink = StalledSink()
+    stalled = run_structured(stalled_sink, args.calls, args.queue_size)
+    stalled_sink.release.set()
+
+    print(f"{'sink':<22}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'max us':>10}{'dropped':>10}")
+    for label, r in (("structured / healthy", healthy), ("structured / stalled", stalled)):
+        print(f"{label:<22}{r['mean_us']:>10.2f}{r['p50_us']:>10.2f}{r['p99_us']:>10.2f}{r['max_us']:>10.1f}{r['dropped']:>10}")
+
+    blocked = run_print_stalled(args.calls)
+    print(f"print() / stalled: {'blocked the caller' if blocked else 'did not block'}")
+
+    ratio = stalled["p50_us"] / healthy["p50_us"] if healthy["p50_us"] else 0
+    print(f"stalled/healthy p50 ratio: {ratio:.2f}")
+
+
+if __name__ == "__main__":
+    main()
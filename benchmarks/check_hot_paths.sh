@@ -0,0 +1,47 @@
+#!/bin/sh
+# Pre-deploy performance gate for the per-turn hot paths.
+#
+# Compares the working tree with this runner's stored baseline,
+# benchmarks/baselines/$BENCH_RUNNER.json (record it with
+# `make bench-baseline` on the runner and commit it; re-record it when a
+# slowdown is accepted). The baseline only moves when someone records it,
+# so gradual slowdowns across many commits still add up to a failure.
+#
+# With BENCH_BASE_REF set, the baseline is instead timed from that revision
+# (e.g. the deployed tag) back to back with the working tree, which also
+# works on a runner with no stored baseline. Cases the base revision
+# doesn't have are skipped.
+#
+#   BENCH_RUNNER     baseline name (default "default")
+#   BENCH_BASE_REF   revision to time as the baseline instead
+#   BENCH_TOLERANCE  allowed slowdown per case (default 0.25 = 25%, above
+#                    the run-to-run noise of best-of-5 timings)
+#   PYTHON           interpreter (default python)
+#
+# Exits 1 on a regression and 2 without a baseline, like bench_hot_paths.py.
+set -eu
+
+TOLERANCE=${BENCH_TOLERANCE:-0.25}
+PYTHON=${PYTHON:-python}
+
+HERE=$(cd "$(dirname "$0")" && pwd)
+REPO=$(cd "$HERE/.." && pwd)
+
+if [ -z "${BENCH_BASE_REF:-}" ]; then
+    BASELINE="$HERE/baselines/${BENCH_RUNNER:-default}.json"
+    if [ ! -f "$BASELINE" ]; then
+        echo "no stored baseline at $BASELINE; record one with 'make bench-baseline' or set BENCH_BASE_REF" >&2
+        exit 2
+    fi
+    echo "baseline: $BASELINE"
+    exec "$PYTHON" "$HERE/bench_hot_paths.py" --baseline "$BASELINE" --tolerance "$TOLERANCE"
+fi
+
+WORK=$(mktemp -d)
+trap 'git -C "$REPO" worktree remove --force "$WORK/base" >/dev/null 2>&1; rm -rf "$WORK"' EXIT
+
+git -C "$REPO" worktree add --detach "$WORK/base" "$BENCH_BASE_REF" >/dev/null
+
+echo "baseline: $BENCH_BASE_REF"
+BENCH_ROOT="$WORK/base" "$PYTHON" "$HERE/bench_hot_paths.py" --save --baseline "$WORK/baseline.json"
+"$PYTHON" "$HERE/bench_hot_paths.py" --baseline "$WORK/baseline.json" --tolerance "$TOLERANCE"
@@ -0,0 +1,118 @@
+"""
+Offline build step for the opening question bank.
+
+Generates opening and early-difficulty questions for each domain with the
+same interviewer rules as generate_question, then pre-synthesizes their
+audio. Output goes to QUESTION_BANK_DIR (bank.json + audio/*.mp3).
+
+Usage:
+    python build_question_bank.py                       # default domains
+    python build_question_bank.py "Backend Developer" "Data Analyst" --count 15
+"""
+import argparse
+import json
+import os
+
+from groq import Groq
+
+from config import GROQ_API_KEY, QUESTION_BANK_DIR
+from question_bank import audio_path
+from results_store import domain_key
+from voice_engine import speak
+
+DEFAULT_DOMAINS = [
+    "Backend Developer",
+    "Frontend Developer",
+    "Full Stack Developer",
+    "Data Scientist",
+    "Data Analyst",
+    "DevOps Engineer",
+    "Machine Learning Engineer",
+    "Android Developer",
+]
+
+LEVELS = {
+    "opening": "very basic, warm-up level questions about core fundamentals of the role",
+    "early": "slightly harder fundamentals questions, still suitable early in the interview",
+}
+
+client = Groq(api_key=GROQ_API_KEY)
+
+
+def generate_questions(domain, level, count):
+    prompt = f"""
+You are a professional technical interviewer for a {domain} position.
+
+Write {count} different {LEVELS[level]}.
+
+Rules:
+- Each question must be a single sentence ending with a question mark.
+- Only verbally answerable questions, answerable in 30-40 seconds. Never ask the candidate to write code.
+- No introductions, transitions, names or numbering.
+- Do not depend on anything the candidate said earlier.
+
+Return ONLY a JSON array of strings.
+"""
+    response = client.chat.completions.create(
+        model="llama-3.1-8b-instant",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.9,
+        max_tokens=60 * count
+    )
+    text = response.choices[0].message.content
+    questions = json.loads(text[text.find("["):text.rfind("]") + 1])
+
+    cleaned = []
+    for q in questions:
+        q = " ".join(str(q).split())
+        if q.endswith("?") and q not in cleaned:
+            cleaned.append(q)
+    return cleaned
+
+
+def synthesize(question):
+    path = audio_path(question)
+    if os.path.exists(path):
+        return True
+    audio = speak(question)
+    if not audio:
+        return False
+    with open(path, "wb") as f:
+        f.write(audio)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the opening question bank")
+    parser.add_argument("domains", nargs="*", default=DEFAULT_DOMAINS)
+    parser.add_argument("--count", type=int, default=12, help="questions per level")
+    parser.add_argument("--no-audio", action="store_true", help="skip TTS")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.join(QUESTION_BANK_DIR, "audio"), exist_ok=True)
+    bank_path = os.path.join(QUESTION_BANK_DIR, "bank.json")
+
+    bank = {"domains": {}}
+    if os.path.exists(bank_path):
+        with open(bank_path, encoding="utf-8") as f:
+            bank = json.load(f)
+
+    for domain in args.domains:
+        entry = {"domain": domain}
+        for level in LEVELS:
+            questions = generate_questions(domain, level, args.count)
+            if not args.no_audio:
+                # Only keep questions whose audio exists, so /voice never misses
+                questions = [q for q in questions if synthesize(q)]
+            entry[level] = questions
+            print(f"{domain} / {level}: {len(questions)} questions")
+        bank["domains"][domain_key(domain)] = entry
+
+    with open(bank_path, "w", encoding="utf-8") as f:
+        json.dump(bank, f, indent=2, ensure_ascii=False)
+
+    print("Question bank written to", bank_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,3 +8,38 @@ CAMB_API_KEY = os.getenv("CAMB_API_KEY")
 SARVAM_API_KEY = os.getenv("SARVAM_API_KEY")
 ARTESIA_API_KEY=os.getenv("CARTESIA_API_KEY")
 
+# Speech-to-text backend for streaming answers: groq | local | stub
+STT_BACKEND = os.getenv("STT_BACKEND", "groq")
+# Trailing silence (ms) that marks the end of a candidate's answer
+VAD_SILENCE_MS = int(os.getenv("VAD_SILENCE_MS", "700"))
+
+# SQLite file holding finished interview results
+RESULTS_DB_PATH = os.getenv("RESULTS_DB_PATH", "results.db")
+
+# Precomputed opening questions + audio (built by build_question_bank.py)
+QUESTION_BANK_DIR = os.getenv("QUESTION_BANK_DIR", "question_bank")
+
+# Turns of each conversation kept in memory; older turns spill to
+# CONVERSATION_DIR/<session_id>.jsonl until the interview ends
+CONVERSATION_WINDOW = int(os.getenv("CONVERSATION_WINDOW", "8"))
+CONVERSATION_DIR = os.getenv("CONVERSATION_DIR", "conversations")
+
+# Sessions with no activity for SESSION_IDLE_SECONDS (abandoned, never sent
+# to /end) are dropped, and spill files untouched for as long are deleted.
+# Swept at startup and every SESSION_SWEEP_SECONDS
+SESSION_IDLE_SECONDS = int(os.getenv("SESSION_IDLE_SECONDS", "3600"))
+SESSION_SWEEP_SECONDS = int(os.getenv("SESSION_SWEEP_SECONDS", "300"))
+
+# Answers longer than MAX_ANSWER_CHARS are truncated before they are stored;
+# /answer rejects request bodies over MAX_ANSWER_REQUEST_CHARS outright
+MAX_ANSWER_CHARS = int(os.getenv("MAX_ANSWER_CHARS", "4000"))
+MAX_ANSWER_REQUEST_CHARS = int(os.getenv("MAX_ANSWER_REQUEST_CHARS", "20000"))
+
+# Shared by router.py and its workers. X-Client-Id is trusted only on
+# requests carrying this secret in X-Router-Secret; otherwise per-client
+# budgets are keyed on the connection's peer address
+ROUTER_SECRET = os.getenv("ROUTER_SECRET")
+
+# Bearer token for the /results/* endpoints (candidate names, scores and
+# transcripts). Unset disables them
+RESULTS_ADMIN_TOKEN = os.getenv("RESULTS_ADMIN_TOKEN")
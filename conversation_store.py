@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+import time
+
+from config import CONVERSATION_DIR, CONVERSATION_WINDOW, MAX_ANSWER_CHARS
+
+# Turns are stored as (role index, content) - far smaller than a dict per turn
+ROLES = ("assistant", "user", "system")
+_ROLE_INDEX = {role: i for i, role in enumerate(ROLES)}
+
+
+class Conversation:
+    """
+    Interview transcript with a bounded in-memory window.
+
+    Behaves like the list of {"role", "content"} dicts it replaces: append,
+    len, iteration and indexing (conv[-1], conv[-6:]) all work. Only the most
+    recent turns stay in memory; once twice the window is held, the older
+    half is appended to <CONVERSATION_DIR>/<session_id>.jsonl and read back
+    only when the full transcript is iterated (analysis, /end).
+    """
+
+    __slots__ = ("session_id", "window", "recent", "spilled", "lock")
+
+    def __init__(self, session_id, window=CONVERSATION_WINDOW):
+        self.session_id = session_id
+        self.window = max(1, window)
+        self.recent = []
+        self.spilled = 0
+        self.lock = threading.Lock()
+
+    @property
+    def path(self):
+        return os.path.join(CONVERSATION_DIR, f"{self.session_id}.jsonl")
+
+    def append(self, turn):
+        with self.lock:
+            self.recent.append((_ROLE_INDEX[turn["role"]], turn["content"]))
+            if len(self.recent) >= 2 * self.window:
+                self._spill(len(self.recent) - self.window)
+
+    def _spill(self, count):
+        os.makedirs(CONVERSATION_DIR, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for role, content in self.recent[:count]:
+                f.write(json.dumps([role, content]) + "\n")
+        del self.recent[:count]
+        self.spilled += count
+
+    def __len__(self):
+        return self.spilled + len(self.recent)
+
+    def __iter__(self):
+        with self.lock:
+            spilled = self.spilled
+            recent = list(self.recent)
+
+        if spilled:
+            with open(self.path, encoding="utf-8") as f:
+                for _, line in zip(range(spilled), f):
+                    role, content = json.loads(line)
+                    yield {"role": ROLES[role], "content": content}
+
+        for role, content in recent:
+            yield {"role": ROLES[role], "content": content}
+
+    def __getitem__(self, index):
+        # Recent turns are served from memory; anything older reads the file
+        with self.lock:
+            total = self.spilled + len(self.recent)
+            if isinstance(index, slice):
+                start, stop, step = index.indices(total)
+                if step == 1 and start >= self.spilled:
+                    return [
+                        {"role": ROLES[role], "content": content}
+                        for role, content in self.recent[start - self.spilled:stop - self.spilled]
+                    ]
+            else:
+                position = index + total if index < 0 else index
+                if not 0 <= position < total:
+                    raise IndexError("conversation index out of range")
+                if position >= self.spilled:
+                    role, content = self.recent[position - self.spilled]
+                    return {"role": ROLES[role], "content": content}
+
+        return self.to_list()[index]
+
+    def to_list(self):
+        return list(self)
+
+    def discard(self):
+        """Drop the spill file once the result has been stored."""
+        with self.lock:
+            if self.spilled:
+                try:
+                    os.remove(self.path)
+                except FileNotFoundError:
+                    pass
+            self.recent = []
+            self.spilled = 0
+
+
+def remove_stale_spills(max_age, keep=()):
+    """
+    Delete spill files not modified for `max_age` seconds, except those of
+    the session ids in `keep`. Live sessions append to their file as they
+    spill, so a stale file belongs to a session no worker is running (crash,
+    restart, abandoned interview). Returns the number of files removed.
+    """
+    if not os.path.isdir(CONVERSATION_DIR):
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for entry in os.scandir(CONVERSATION_DIR):
+        session_id, ext = os.path.splitext(entry.name)
+        if ext != ".jsonl" or session_id in keep:
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def truncate_answer(answer):
+    """Cap very long (e.g. pasted) answers at MAX_ANSWER_CHARS."""
+    if len(answer) <= MAX_ANSWER_CHARS:
+        return answer
+    return answer[:MAX_ANSWER_CHARS].rstrip() + " [answer truncated]"
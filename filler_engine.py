@@ -0,0 +1,99 @@
+import random
+import threading
+
+from analysis_engine import DONT_KNOW_PHRASES
+from interview_engine import detect_abuse
+from voice_engine import speak
+from structured_log import get_logger
+
+logger = get_logger("filler")
+
+# --------------------------------------------------
+# ACKNOWLEDGEMENT POOL (played while the next question is generated)
+# --------------------------------------------------
+# Short, context-neutral clips. They are never stored in the conversation,
+# so analysis and the LLM context are unchanged.
+ACKNOWLEDGEMENTS = {
+    "dont_know": [
+        "No problem.",
+        "That's okay.",
+        "Alright, no worries.",
+    ],
+    "short": [
+        "Okay.",
+        "Alright.",
+        "Got it.",
+    ],
+    "default": [
+        "Thank you.",
+        "Got it, thanks.",
+        "Okay, thanks for that.",
+        "Alright, thank you.",
+    ],
+}
+
+SHORT_ANSWER_WORDS = 8
+
+_audio_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _clip_id(category, index):
+    return f"{category}-{index}"
+
+
+def classify_answer(text):
+    lower = text.lower()
+    if any(phrase in lower for phrase in DONT_KNOW_PHRASES):
+        return "dont_know"
+    if len(text.split()) < SHORT_ANSWER_WORDS:
+        return "short"
+    return "default"
+
+
+def pick_acknowledgement(text, stage):
+    """
+    Choose an acknowledgement for the candidate's answer.
+    Returns {"id", "text", "audio_ready"} or None when no filler should play
+    (abusive answer or not in the technical stage).
+    """
+    if stage != "technical" or detect_abuse(text):
+        return None
+
+    category = classify_answer(text)
+    index = random.randrange(len(ACKNOWLEDGEMENTS[category]))
+    clip_id = _clip_id(category, index)
+
+    return {
+        "id": clip_id,
+        "text": ACKNOWLEDGEMENTS[category][index],
+        "audio_ready": clip_id in _audio_cache,
+    }
+
+
+def get_ack_audio(clip_id):
+    """Return MP3 bytes for an acknowledgement, synthesizing on first use."""
+    if clip_id in _audio_cache:
+        return _audio_cache[clip_id]
+
+    category, _, index = clip_id.rpartition("-")
+    if category not in ACKNOWLEDGEMENTS or not index.isdigit():
+        return None
+    if int(index) >= len(ACKNOWLEDGEMENTS[category]):
+        return None
+
+    audio = speak(ACKNOWLEDGEMENTS[category][int(index)])
+    if audio:
+        with _cache_lock:
+            _audio_cache[clip_id] = audio
+    return audio
+
+
+def warm_ack_cache():
+    """Pre-synthesize every acknowledgement clip (run once at startup)."""
+    for category, phrases in ACKNOWLEDGEMENTS.items():
+        for index in range(len(phrases)):
+            try:
+                get_ack_audio(_clip_id(category, index))
+            except Exception as e:
+                logger.warning("ack warmup failed", extra={"clip": _clip_id(category, index), "error": str(e)})
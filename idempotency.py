@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+# How long a completed response is kept for replay (seconds)
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "900"))
+# How long a duplicate waits for the original request to finish (seconds)
+IDEMPOTENCY_WAIT = int(os.getenv("IDEMPOTENCY_WAIT", "60"))
+
+# (scope, key) -> {"fingerprint", "done", "result", "error", "expires"}
+_entries = {}
+_lock = threading.Lock()
+
+
+class IdempotencyConflict(Exception):
+    """Same key reused with a different request body."""
+
+
+class IdempotencyInProgress(Exception):
+    """The original request is still running after IDEMPOTENCY_WAIT."""
+
+
+def fingerprint(payload):
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _purge_expired(now):
+    expired = [k for k, e in _entries.items() if e["done"].is_set() and e["expires"] <= now]
+    for k in expired:
+        del _entries[k]
+
+
+def claim(scope, key, payload):
+    """
+    Register a request under (scope, key).
+    Returns (owner, entry): the owner runs the work and must call complete()
+    or fail(); anyone else calls wait(entry) for the owner's result.
+    Raises IdempotencyConflict if the key was used with a different payload.
+    """
+    request_fp = fingerprint(payload)
+    now = time.time()
+
+    with _lock:
+        _purge_expired(now)
+        entry = _entries.get((scope, key))
+        owner = entry is None
+        if owner:
+            entry = {
+                "scope": scope,
+                "key": key,
+                "fingerprint": request_fp,
+                "done": threading.Event(),
+                "result": None,
+                "error": None,
+                "expires": 0,
+            }
+            _entries[(scope, key)] = entry
+
+    if not owner and entry["fingerprint"] != request_fp:
+        raise IdempotencyConflict(f"Idempotency key reused with a different {scope} request")
+    return owner, entry
+
+
+def wait(entry):
+    """Block until the owner finishes; return its result or re-raise its error."""
+    if not entry["done"].wait(IDEMPOTENCY_WAIT):
+        raise IdempotencyInProgress(f"Original {entry['scope']} request is still in progress")
+    if entry["error"] is not None:
+        raise entry["error"]
+    return entry["result"]
+
+
+def complete(entry, result):
+    entry["result"] = result
+    entry["expires"] = time.time() + IDEMPOTENCY_TTL
+    entry["done"].set()
+
+
+def fail(entry, error):
+    # Failures are not cached - a later retry runs again
+    entry["error"] = error
+    with _lock:
+        _entries.pop((entry["scope"], entry["key"]), None)
+    entry["done"].set()
+
+
+def run_once(scope, key, payload, fn):
+    """
+    Run `fn()` at most once per (scope, key).
+
+    A duplicate with the same payload waits for the in-flight call and gets
+    its result; once finished the result is replayed until it expires.
+    Failures are not cached, so a retry after an error runs again.
+    Without a key, `fn()` just runs.
+    """
+    if not key:
+        return fn()
+
+    owner, entry = claim(scope, key, payload)
+    if not owner:
+        return wait(entry)
+
+    try:
+        result = fn()
+    except Exception as e:
+        fail(entry, e)
+        raise
+
+    complete(entry, result)
+    return result
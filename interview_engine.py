@@ -1,10 +1,19 @@
-import os
-from groq import Groq
+import re
+import time
+import uuid
 import random  # Added for random message selection
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+from analysis_engine import analyze_interview, analyze_interview_stream
+import question_bank
+import results_store
+from config import SESSION_IDLE_SECONDS
+from conversation_store import Conversation, truncate_answer, remove_stale_spills
+from structured_log import get_logger
+from llm_scheduler import chat_completion, LLMQueueTimeout, LIVE, CLOSING
+import ledger
+import time_scheduler
 
-client = Groq(api_key=GROQ_API_KEY)
+logger = get_logger("interview")
 
 # ------------------------------
 # SESSION-BASED STATE STORAGE
@@ -14,7 +23,8 @@ sessions = {}
 def get_or_create_session(session_id):
     if session_id not in sessions:
         sessions[session_id] = {
-            "conversation": [],
+            "last_active": time.time(),
+            "conversation": Conversation(session_id),
             "interview_stage": "technical",
             "name": "",
             "domain": "",
@@ -23,9 +33,97 @@ def get_or_create_session(session_id):
         }
     return sessions[session_id]
 
+# Ids minted by start_session (or pre-minted by router.py)
+SESSION_ID_PATTERN = re.compile(r"session_\d+_[0-9a-f]{8}")
+
+def new_session_id():
+    return f"session_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+
+def session_exists(session_id):
+    return session_id in sessions
+
 def delete_session(session_id):
     if session_id in sessions:
-        del sessions[session_id]
+        sessions.pop(session_id)["conversation"].discard()
+    ledger.close_session(session_id)
+    time_scheduler.close_session(session_id)
+
+def expire_idle_sessions(max_idle=SESSION_IDLE_SECONDS):
+    """
+    Drop sessions idle for `max_idle` seconds (abandoned without /end) and
+    spill files left behind by sessions no longer running.
+    """
+    now = time.time()
+    expired = [
+        session_id for session_id, session in list(sessions.items())
+        if now - session.get("last_active", session.get("start_time", now)) > max_idle
+    ]
+    for session_id in expired:
+        delete_session(session_id)
+    removed = remove_stale_spills(max_idle, keep=set(sessions))
+    if expired or removed:
+        logger.info("expired idle sessions", extra={"sessions": len(expired), "spill_files": removed})
+    return expired
+
+# --------------------------------------------------
+# START SESSION (greeting + timing)
+# --------------------------------------------------
+def start_session(name, domain, duration, client_id="local", session_id=None):
+    """
+    Create a new interview session and return the opening greeting.
+    `session_id` lets the router pre-mint the id so it can pick the worker
+    first; it must match SESSION_ID_PATTERN and not be in use (ValueError).
+    Raises ledger.BudgetExceeded if the client has started too many interviews.
+    """
+    if session_id is None:
+        session_id = new_session_id()
+    elif not SESSION_ID_PATTERN.fullmatch(session_id) or session_exists(session_id):
+        raise ValueError("Invalid or duplicate session id")
+
+    ledger.open_session(session_id, client_id)
+    time_scheduler.open_session(session_id)
+    session = get_or_create_session(session_id)
+    session["name"] = name
+    session["domain"] = domain
+    session["start_time"] = time.time()
+
+    # Parse duration
+    if duration == "3":
+        session["duration_seconds"] = 3 * 60
+    elif duration == "10":
+        session["duration_seconds"] = 10 * 60
+    else:
+        session["duration_seconds"] = 5 * 60
+
+    first_name = name.split()[0]
+
+    # List of greeting variations
+    greetings = [
+        f"Hey Mr. {first_name}, welcome to your {domain} interview. Thanks for joining me today, I'll be conducting your interview. I am excited to get started! Can you tell me a little bit about yourself?",
+        f"Hello {first_name}, it's great to have you here for your {domain} interview. I'm thrilled to be your interviewer today. Let's dive right in—could you share a bit about your background?",
+        f"Hi {first_name}, welcome to the {domain} interview session. Thanks for participating; I'm looking forward to this. Shall we begin? Tell me a little about yourself.",
+        f"Greetings {first_name}, nice to meet you virtually for your {domain} interview. I'll be guiding you through this. Excited to learn more! Can you introduce yourself briefly?"
+    ]
+
+    # Randomly select one
+    greeting_full = random.choice(greetings)
+    greeting_repeat = "Can you tell me a little bit about yourself?"
+
+    # Store first message in conversation
+    session["conversation"].append({
+        "role": "assistant",
+        "content": greeting_full
+    })
+
+    session["question_count"] = 1
+    session["last_prompt_at"] = time.time()
+
+    return {
+        "session_id": session_id,
+        "question": greeting_full,
+        "repeat_question": greeting_repeat,
+        "duration": session["duration_seconds"],
+    }
 
 # For backward compatibility (CLI usage)
 conversation = []
@@ -87,13 +185,20 @@ Candidate's question: "{question}"
 """
 
     try:
-        response = client.chat.completions.create(
+        if session_id and ledger.is_degraded(session_id):
+            raise LLMQueueTimeout("session budget reached")
+
+        started = time.monotonic()
+        response = chat_completion(
+            CLOSING, "check_question_relevance", session_id,
             model="llama-3.1-8b-instant",
             messages=[{"role": "user", "content": system_prompt}],
             temperature=0.3,
             max_tokens=150
         )
         reply = response.choices[0].message.content.strip()
+        # The closing reply time feeds time_scheduler.closing_seconds
+        time_scheduler.record("closing", time.monotonic() - started, session_id)
 
         if reply.upper().startswith("RELEVANT:"):
             return True, reply[len("RELEVANT:"):].strip()
@@ -103,12 +208,44 @@ Candidate's question: "{question}"
             # Default: treat as relevant
             return True, reply
     except Exception as e:
-        print("QUESTION RELEVANCE CHECK ERROR:", e)
+        logger.error("question relevance check failed", extra={"session_id": session_id, "stage": "candidate_questions", "error": str(e)})
         return True, "That's a good question. I'd suggest discussing that with the hiring manager during the next round."
 
 # --------------------------------------------------
 # GENERATE NEXT QUESTION
 # --------------------------------------------------
+def first_question_transition(name):
+    return f"Okay Mr. {name}, let's dive into some technical background and skills. "
+
+def split_question(question):
+    """
+    Split raw LLM output into the full message (explanation + question) and
+    the short repeat message (just the final question, used for retries).
+    """
+    # Parse for separator
+    if '---' in question:
+        parts = question.split('---', 1)
+        full_message = parts[0].strip() + '\n' + parts[1].strip()
+        repeat_message = parts[1].strip()
+    else:
+        full_message = question
+        repeat_message = question
+
+    # Post-process repeat_message to ensure it's always just the core question
+    # Take the last sentence that ends with '?' (assuming the question is at the end)
+    sentences = repeat_message.split('.')
+    last_sentence = sentences[-1].strip()
+    if last_sentence.endswith('?'):
+        repeat_message = last_sentence
+    else:
+        # Fallback: If no '?', keep the last sentence (for edge cases)
+        repeat_message = last_sentence
+    # Ensure it starts with a capital letter if possible
+    if repeat_message and not repeat_message[0].isupper():
+        repeat_message = repeat_message[0].upper() + repeat_message[1:]
+
+    return full_message, repeat_message
+
 def generate_question(topic, name, session_id=None):
 
     if session_id:
@@ -125,6 +262,22 @@ def generate_question(topic, name, session_id=None):
         closing_msg = generate_closing(name, session_id)
         return {'full': closing_msg, 'repeat': closing_msg}  # Always return dict
 
+    # First technical questions come from the precomputed bank when the
+    # introduction doesn't call for a tailored follow-up (no LLM round trip)
+    banked = question_bank.pick_question(session) if session_id else None
+    if banked:
+        full_message = banked
+        if session["question_count"] == 1:
+            full_message = first_question_transition(name) + banked
+
+        conv.append({
+            "role": "assistant",
+            "content": full_message
+        })
+        session["question_count"] += 1
+
+        return {'full': full_message, 'repeat': banked}
+
     system_prompt = f"""
 You are a professional technical interviewer named Syera.
 
@@ -159,47 +312,41 @@ Interview Rules:
     messages = [{"role": "system", "content": system_prompt}]
     messages.extend(conv[-6:])
 
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=messages,
-        temperature=0.6,
-        max_tokens=80
-    )
+    try:
+        # Over budget: skip the LLM and use the cheap fallback question
+        if session_id and ledger.is_degraded(session_id):
+            raise LLMQueueTimeout("session budget reached")
 
-    question = response.choices[0].message.content.strip()
+        started = time.monotonic()
+        response = chat_completion(
+            LIVE, "generate_question", session_id,
+            model="llama-3.1-8b-instant",
+            messages=messages,
+            temperature=0.6,
+            max_tokens=80
+        )
+        question = response.choices[0].message.content.strip()
+        time_scheduler.record("question", time.monotonic() - started, session_id)
+    except LLMQueueTimeout as e:
+        # Provider quota is saturated - ask a generic question rather than stall the turn
+        logger.warning("generate_question degraded", extra={"session_id": session_id, "stage": stage, "error": str(e)})
+        question = question_bank.fallback_question(session if session_id else {}, topic)
 
-    # Parse for separator
-    if '---' in question:
-        parts = question.split('---', 1)
-        full_message = parts[0].strip() + '\n' + parts[1].strip()
-        repeat_message = parts[1].strip()
-    else:
-        full_message = question
-        repeat_message = question
+    full_message, repeat_message = split_question(question)
 
     # Add transition for first question after intro
     if session_id and session["question_count"] == 1:  # First technical question
-        transition = f"Okay Mr. {name}, let's dive into some technical background and skills. "
-        full_message = transition + full_message
+        full_message = first_question_transition(name) + full_message
         # DO NOT add transition to repeat_message - keep it short for retries
 
-    # Post-process repeat_message to ensure it's always just the core question
-    # Take the last sentence that ends with '?' (assuming the question is at the end)
-    sentences = repeat_message.split('.')
-    last_sentence = sentences[-1].strip()
-    if last_sentence.endswith('?'):
-        repeat_message = last_sentence
-    else:
-        # Fallback: If no '?', keep the last sentence (for edge cases)
-        repeat_message = last_sentence
-    # Ensure it starts with a capital letter if possible
-    if repeat_message and not repeat_message[0].isupper():
-        repeat_message = repeat_message[0].upper() + repeat_message[1:]
-
-    # Debug logging
-    print("DEBUG: Raw AI response:", question)
-    print("DEBUG: Full message after transition:", full_message)
-    print("DEBUG: Repeat message after processing:", repeat_message)
+    # Debug logging (sampled / rate limited, never blocks the request)
+    logger.debug("generated question", extra={
+        "session_id": session_id,
+        "stage": stage,
+        "raw": question,
+        "full": full_message,
+        "repeat": repeat_message,
+    })
 
     conv.append({
         "role": "assistant",
@@ -254,27 +401,31 @@ def generate_time_warning(name, session_id=None):
 # --------------------------------------------------
 # CLOSING MESSAGE (asks candidate for questions)
 # --------------------------------------------------
+def _pick_closing():
+    # List of closing variations
+    closings = [
+        "That concludes the technical part of our interview. You did well! Before we wrap up, do you have any questions for me about the role, the team, or anything else you would like to know?",
+        "We've covered the main interview questions. Great job on your responses! Now, is there anything you'd like to ask regarding the position, the team, or the company?",
+        "The technical portion is complete. You handled it well! Before we end, do you have questions about the role, our team, or anything else?",
+        "Alright, that's the end of the core interview questions. You did a fantastic job! Feel free to ask about the role, the team, or whatever else is on your mind."
+    ]
+
+    # Randomly select one
+    return random.choice(closings)
+
 def generate_closing(name, session_id=None):
 
     if session_id:
         session = get_or_create_session(session_id)
         conv = session["conversation"]
         session["interview_stage"] = "candidate_questions"
+        # Use the message picked in advance by prepare_closing, if any
+        closing_message = session.pop("prepared_closing", None) or _pick_closing()
     else:
         global interview_stage
         interview_stage = "candidate_questions"
         conv = conversation
-
-    # List of closing variations
-    closings = [
-        "That concludes the technical part of our interview. You did well! Before we wrap up, do you have any questions for me about the role, the team, or anything else you would like to know?",
-        "We've covered the main interview questions. Great job on your responses! Now, is there anything you'd like to ask regarding the position, the team, or the company?",
-        "The technical portion is complete. You handled it well! Before we end, do you have questions about the role, our team, or anything else?",
-        "Alright, that's the end of the core interview questions. You did a fantastic job! Feel free to ask about the role, the team, or whatever else is on your mind."
-    ]
-    
-    # Randomly select one
-    closing_message = random.choice(closings)
+        closing_message = _pick_closing()
 
     conv.append({
         "role": "assistant",
@@ -286,27 +437,30 @@ def generate_closing(name, session_id=None):
 # --------------------------------------------------
 # FINAL GOODBYE MESSAGE
 # --------------------------------------------------
+def _pick_goodbye(name):
+    # List of goodbye variations
+    goodbyes = [
+        f"Thank you so much for your time today, {name}. It was a pleasure speaking with you. We will review your interview and get back to you soon. Best of luck with everything! Have a wonderful day. Goodbye.",
+        f"Thanks for joining us today, {name}. It was great chatting with you. We'll be in touch after reviewing your interview. Wishing you all the best! Take care.",
+        f"Appreciate your time and effort, {name}. Pleasure to interview you. Expect to hear from us shortly with next steps. Good luck ahead! Farewell.",
+        f"Thank you for your participation, {name}. It was enjoyable speaking with you. We'll follow up soon with next steps. Best wishes! Goodbye."
+    ]
+
+    # Randomly select one
+    return random.choice(goodbyes)
+
 def generate_goodbye(name, session_id=None):
     """Generate the final farewell message with best of luck."""
     if session_id:
         session = get_or_create_session(session_id)
         conv = session["conversation"]
         session["interview_stage"] = "final"
+        goodbye = session.pop("prepared_goodbye", None) or _pick_goodbye(name)
     else:
         global interview_stage
         interview_stage = "final"
         conv = conversation
-
-    # List of goodbye variations
-    goodbyes = [
-        f"Thank you so much for your time today, {name}. It was a pleasure speaking with you. We will review your interview and get back to you soon. Best of luck with everything! Have a wonderful day. Goodbye.",
-        f"Thanks for joining us today, {name}. It was great chatting with you. We'll be in touch after reviewing your interview. Wishing you all the best! Take care.",
-        f"Appreciate your time and effort, {name}. Pleasure to interview you. Expect to hear from us shortly with next steps. Good luck ahead! Farewell.",
-        f"Thank you for your participation, {name}. It was enjoyable speaking with you. We'll follow up soon with next steps. Best wishes! Goodbye."
-    ]
-    
-    # Randomly select one
-    goodbye = random.choice(goodbyes)
+        goodbye = _pick_goodbye(name)
 
     conv.append({
         "role": "assistant",
@@ -316,46 +470,32 @@ def generate_goodbye(name, session_id=None):
     return goodbye
 
 # --------------------------------------------------
-# ANSWER LAST CANDIDATE QUESTION
+# PREPARE CLOSING TURNS IN ADVANCE
 # --------------------------------------------------
-def answer_candidate_question(question, session_id=None):
-
-    if session_id:
-        session = get_or_create_session(session_id)
-        conv = session["conversation"]
-    else:
-        conv = conversation
-
-    system_prompt = """
-You are a professional interviewer answering the candidate's final question.
-Reply briefly and professionally in 2-3 sentences.
-"""
-
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": question}
-        ],
-        temperature=0.5,
-        max_tokens=120
-    )
-
-    reply = response.choices[0].message.content.strip()
-
-    conv.append({
-        "role": "assistant",
-        "content": reply
-    })
-
-    return reply
+def prepare_closing(name, session_id):
+    """
+    Pick the closing and goodbye messages ahead of time so their audio can be
+    synthesized while the interview is still running. generate_closing and
+    generate_goodbye will use these exact texts.
+    """
+    session = get_or_create_session(session_id)
+    session.setdefault("prepared_closing", _pick_closing())
+    session.setdefault("prepared_goodbye", _pick_goodbye(name))
+    return [session["prepared_closing"], session["prepared_goodbye"]]
 
 # --------------------------------------------------
 # STORE ANSWER
 # --------------------------------------------------
 def store_answer(answer, session_id=None):
+    answer = truncate_answer(answer)
     if session_id:
         session = get_or_create_session(session_id)
+        session["last_active"] = time.time()
+        # Time from the interviewer's turn being served to this answer arriving
+        if "last_prompt_at" in session:
+            gap = round(time.time() - session["last_prompt_at"], 2)
+            session.setdefault("answer_gaps", []).append(gap)
+            time_scheduler.record("answer", gap, session_id)
         session["conversation"].append({
             "role": "user",
             "content": answer
@@ -370,7 +510,334 @@ def store_answer(answer, session_id=None):
 # GET FULL CONVERSATION
 # --------------------------------------------------
 def get_full_conversation(session_id=None):
+    """Whole transcript as a list of dicts (reads spilled turns back from disk)."""
     if session_id:
         session = get_or_create_session(session_id)
-        return session["conversation"]
-    return conversation
\ No newline at end of file
+        return session["conversation"].to_list()
+    return conversation
+# --------------------------------------------------
+# CANDIDATE "NO QUESTIONS" CHECK
+# --------------------------------------------------
+NO_QUESTION_PHRASES = [
+    "no", "nope", "nothing", "no questions", "i don't have",
+    "i do not have", "that's all", "that is all", "i'm good",
+    "no thank you", "no thanks", "all good", "i am good",
+    "skip", "none",
+]
+
+def candidate_has_no_questions(text):
+    """Check if the candidate declined to ask any questions."""
+    candidate_text = text.strip().lower()
+    return any(phrase in candidate_text for phrase in NO_QUESTION_PHRASES)
+
+# --------------------------------------------------
+# PROCESS ANSWER (shared by /answer and streaming ingest)
+# --------------------------------------------------
+def process_answer(session_id, text):
+    """
+    Store the candidate's answer and produce the next interviewer turn.
+    Returns the response dict served by /answer.
+    """
+    result = _next_turn(session_id, text)
+    session = get_or_create_session(session_id)
+    session["last_prompt_at"] = session["last_active"] = time.time()
+    return result
+
+def _next_turn(session_id, text):
+    session = get_or_create_session(session_id)
+    name = session.get("name", "Candidate")
+    stage = session.get("interview_stage", "technical")
+
+    # ======== STEP 1: ABUSE DETECTION ========
+    if detect_abuse(text):
+        session["abuse_terminated"] = True
+        store_answer(text, session_id)
+
+        termination_msg = generate_abuse_termination_message(name)
+        session["conversation"].append({
+            "role": "assistant",
+            "content": termination_msg
+        })
+
+        return {
+            "question": termination_msg,
+            "repeat_question": termination_msg,  # Same for termination
+            "question_count": session["question_count"],
+            "stage": "abuse_terminated",
+            "elapsed": int(time.time() - session.get("start_time", time.time())),
+            "action": "end_interview",
+        }
+
+    # Store candidate answer
+    store_answer(text, session_id)
+
+    elapsed = time.time() - session.get("start_time", time.time())
+    duration = session.get("duration_seconds", 300)
+    remaining = duration - elapsed
+    max_questions = max(5, int(duration / 60) * 2)
+
+    # ======== STEP 2: CANDIDATE QUESTION PHASE ========
+    # If we're in "candidate_questions" stage, the candidate is asking us questions
+    if stage == "candidate_questions":
+
+        if candidate_has_no_questions(text):
+            # No questions - generate goodbye
+            goodbye_msg = generate_goodbye(name, session_id)
+            return {
+                "question": goodbye_msg,
+                "repeat_question": goodbye_msg,
+                "question_count": session["question_count"],
+                "stage": "final",
+                "elapsed": int(elapsed),
+                "action": "end_interview",
+            }
+        else:
+            # Candidate asked a question - check relevance
+            is_relevant, answer = check_question_relevance(
+                text, session.get("domain", ""), session_id
+            )
+
+            if not is_relevant:
+                # Irrelevant question - note it, answer politely, then goodbye
+                full_reply = (
+                    f"{answer} "
+                    f"Alright {name}, thank you for your time today. "
+                    f"Best of luck with everything, {name}! Have a great day. Goodbye."
+                )
+                session["conversation"].append({
+                    "role": "assistant",
+                    "content": full_reply
+                })
+                return {
+                    "question": full_reply,
+                    "repeat_question": full_reply,
+                    "question_count": session["question_count"],
+                    "stage": "final",
+                    "elapsed": int(elapsed),
+                    "action": "end_interview",
+                    "irrelevant_question": True,
+                }
+            else:
+                # Relevant question - answer it, then say goodbye
+                full_reply = (
+                    f"{answer} "
+                    f"Thank you for that great question, {name}. "
+                    f"It was a pleasure speaking with you today. "
+                    f"We will review your interview and get back to you soon. "
+                    f"Best of luck, {name}! Have a wonderful day. Goodbye."
+                )
+                session["conversation"].append({
+                    "role": "assistant",
+                    "content": full_reply
+                })
+                return {
+                    "question": full_reply,
+                    "repeat_question": full_reply,
+                    "question_count": session["question_count"],
+                    "stage": "final",
+                    "elapsed": int(elapsed),
+                    "action": "end_interview",
+                }
+
+    # ======== STEP 3: TIME-AWARE QUESTION FLOW ========
+    # Ask another question only if it still leaves time for the whole closing,
+    # judged from rolling estimates of LLM, TTS and answer time (so slow
+    # providers close the interview earlier instead of running over).
+    # We never cut off mid-answer - the answer was accepted above.
+    prefetch = None
+    if stage == "technical":
+        closing_text, goodbye_text = prepare_closing(name, session_id)
+        ask_another, last_question = time_scheduler.plan(session_id, remaining, closing_text, goodbye_text)
+
+        if not ask_another or session["question_count"] >= max_questions:
+            # Move to closing, which asks for candidate questions
+            start_closing(session_id)
+            closing_msg = generate_closing(name, session_id)
+
+            return {
+                "question": closing_msg,
+                "repeat_question": closing_msg,
+                "question_count": session["question_count"],
+                "stage": "candidate_questions",
+                "elapsed": int(elapsed),
+                # The goodbye follows the candidate's reply - synthesize it now
+                "prefetch": [goodbye_text],
+            }
+
+        if last_question or session["question_count"] + 1 >= max_questions:
+            # Only the closing comes after this question - synthesize it now
+            prefetch = [closing_text, goodbye_text]
+
+    # Generate next question (handles closing stage internally)
+    next_question = generate_question(
+        session["domain"],
+        name,
+        session_id
+    )
+
+    result = {
+        "question": next_question['full'],
+        "repeat_question": next_question['repeat'],
+        "question_count": session["question_count"],
+        "stage": session["interview_stage"],
+        "elapsed": int(elapsed),
+    }
+    if prefetch:
+        result["prefetch"] = prefetch
+    return result
+
+# --------------------------------------------------
+# FINISH INTERVIEW (analysis + result payload)
+# --------------------------------------------------
+# Score caps applied when the interview was terminated for abusive language
+ABUSE_SCORE_CAPS = {
+    "technical_score": 20,
+    "communication_score": 10,
+    "confidence_score": 15,
+    "overall_score": 15,
+}
+ABUSE_WEAKNESS = "Interview terminated due to use of inappropriate language"
+ABUSE_SUGGESTION = "Maintain professional language and conduct during interviews"
+
+def _analysis_metadata(session_id, session, elapsed):
+    # Pass metadata to the analysis engine so it can properly evaluate
+    # incomplete/short interviews
+    return {
+        "session_id": session_id,
+        "name": session.get("name", "Candidate"),
+        "total_questions": session.get("question_count", 0),
+        "configured_duration": session.get("duration_seconds", 300),
+        "actual_duration": int(elapsed),
+        "early_exit": elapsed < (session.get("duration_seconds", 300) * 0.5),
+        "answer_gaps": session.get("answer_gaps", []),
+    }
+
+def _result_metadata(session_id, session, elapsed):
+    return {
+        "candidateName": session.get("name", ""),
+        "domain": session.get("domain", ""),
+        "totalQuestions": session.get("question_count", 0),
+        "duration": int(elapsed),
+        "configuredDuration": session.get("duration_seconds", 300),
+        "abuseTerminated": session.get("abuse_terminated", False),
+        "usage": ledger.summary(session_id),
+    }
+
+def apply_abuse_caps(field, value):
+    """Cap one analysis field for an abuse-terminated interview."""
+    if field in ABUSE_SCORE_CAPS:
+        return min(value, ABUSE_SCORE_CAPS[field])
+    if field == "weaknesses":
+        return [ABUSE_WEAKNESS] + list(value)
+    if field == "suggestions":
+        return [ABUSE_SUGGESTION] + list(value)
+    return value
+
+def _store_result(session_id, session, result):
+    # Rank against earlier candidates only, then store (with the percentile)
+    try:
+        result["metadata"]["domainPercentile"] = results_store.percentile(
+            session.get("domain", ""), result["analysis"].get("overall_score", 0)
+        )
+        results_store.record_result(session_id, result)
+    except Exception as e:
+        logger.error("results store error", extra={"session_id": session_id, "stage": "end", "error": str(e)})
+
+class SessionNotFound(Exception):
+    """No live session and no stored result for this session id."""
+
+def stored_result(session_id):
+    """
+    The /end result of a session that already finished (a retried /end).
+    Raises SessionNotFound if the session never existed or wasn't stored.
+    """
+    stored = results_store.get_result(session_id)
+    if not stored:
+        raise SessionNotFound(f"Unknown session {session_id}")
+    return {
+        "analysis": stored["analysis"],
+        "metadata": stored["metadata"],
+        "conversation": stored["conversation"],
+    }
+
+def result_events(result):
+    """A finished result as the event sequence finish_interview_stream yields."""
+    yield {"type": "metadata", "metadata": result["metadata"]}
+    yield {"type": "conversation", "conversation": result["conversation"]}
+    for field, value in result["analysis"].items():
+        yield {"type": "analysis", "field": field, "value": value}
+    yield {"type": "done", "analysis": result["analysis"], "metadata": result["metadata"]}
+
+def finish_interview(session_id):
+    """
+    Run the final analysis for a session and build the /end result.
+    The session is deleted afterwards; a retry for a finished session gets
+    the stored result (SessionNotFound if there is none).
+    """
+    if not session_exists(session_id):
+        return stored_result(session_id)
+
+    session = get_or_create_session(session_id)
+    conv = get_full_conversation(session_id)
+
+    elapsed = time.time() - session.get("start_time", time.time())
+
+    analysis = analyze_interview(conv, metadata=_analysis_metadata(session_id, session, elapsed))
+
+    # If terminated due to abuse, reduce all scores significantly
+    if session.get("abuse_terminated", False):
+        for field in ABUSE_SCORE_CAPS:
+            analysis[field] = apply_abuse_caps(field, analysis.get(field, 0))
+        for field in ("weaknesses", "suggestions"):
+            analysis[field] = apply_abuse_caps(field, analysis.get(field, []))
+
+    result = {
+        "analysis": analysis,
+        "metadata": _result_metadata(session_id, session, elapsed),
+        "conversation": conv,
+    }
+
+    _store_result(session_id, session, result)
+
+    # Clean up session
+    delete_session(session_id)
+
+    return result
+
+def finish_interview_stream(session_id):
+    """
+    Streaming variant of finish_interview. Yields events in order:
+      {"type": "metadata"}, {"type": "conversation"},
+      {"type": "analysis", "field", "value"} per field as the LLM produces it,
+      {"type": "done", "analysis", "metadata"} with the complete result.
+    A retry after the session was already finished replays the stored
+    result; SessionNotFound if there is none.
+    """
+    if not session_exists(session_id):
+        yield from result_events(stored_result(session_id))
+        return
+
+    session = get_or_create_session(session_id)
+    conv = get_full_conversation(session_id)
+
+    elapsed = time.time() - session.get("start_time", time.time())
+    metadata = _result_metadata(session_id, session, elapsed)
+    abusive = session.get("abuse_terminated", False)
+
+    # Everything the results page can render without the LLM goes out first
+    yield {"type": "metadata", "metadata": metadata}
+    yield {"type": "conversation", "conversation": conv}
+
+    analysis = {}
+    for field, value in analyze_interview_stream(conv, metadata=_analysis_metadata(session_id, session, elapsed)):
+        if abusive:
+            value = apply_abuse_caps(field, value)
+        analysis[field] = value
+        yield {"type": "analysis", "field": field, "value": value}
+
+    result = {"analysis": analysis, "metadata": metadata, "conversation": conv}
+    _store_result(session_id, session, result)
+
+    delete_session(session_id)
+
+    yield {"type": "done", "analysis": analysis, "metadata": result["metadata"]}
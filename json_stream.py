@@ -0,0 +1,178 @@
+import json
+
+
+class ObjectFieldStream:
+    """
+    Incremental parser for a streamed JSON object.
+
+    Feed raw LLM text chunks with feed(); it returns the top-level
+    (key, value) pairs that became complete in that chunk, in order.
+    Text before the first '{' (e.g. "Here is the JSON:") is ignored, and so
+    is anything after the object closes. A braced span in that leading text
+    ("Here {x} is:") closes with no parseable member; it is dropped and the
+    scan continues at the next '{'. Call finish() at the end of the
+    stream to recover the member that was cut off (e.g. at max_tokens).
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0            # next character to scan
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.member_start = None  # start index of the current top-level member
+        self.members = 0          # members parsed from the current object
+        self.closed = False
+        self.fields = {}
+
+    def feed(self, chunk):
+        completed = []
+        if self.closed or not chunk:
+            return completed
+
+        self.buffer += chunk
+
+        while self.pos < len(self.buffer):
+            ch = self.buffer[self.pos]
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+
+            elif ch == '"':
+                if self.depth >= 1:
+                    self.in_string = True
+
+            elif ch == "{" and self.depth == 0:
+                # Only an object starts the output; brackets in leading prose are skipped
+                self.depth = 1
+                self.member_start = self.pos + 1
+                self.members = 0
+
+            elif self.depth == 0:
+                pass
+
+            elif ch in "{[":
+                self.depth += 1
+
+            elif ch in "}]":
+                if self.depth == 1:
+                    self._finish_member(self.pos, completed)
+                    self.depth = 0
+                    if not self.members:
+                        # Not the output object; keep looking for it
+                        self.member_start = None
+                        self.pos += 1
+                        continue
+                    self.closed = True
+                    self.pos += 1
+                    break
+                self.depth = max(0, self.depth - 1)
+
+            elif ch == "," and self.depth == 1:
+                self._finish_member(self.pos, completed)
+                self.member_start = self.pos + 1
+
+            self.pos += 1
+
+        return completed
+
+    def _finish_member(self, end, completed):
+        member = self.buffer[self.member_start:end].strip()
+        if member:
+            self._finish_member_text(member, completed)
+
+    def finish(self):
+        """
+        Recover the last member of a truncated object, closing any open
+        array or object. A truncated scalar ("score": 7 of 72) can't be told
+        apart from a complete one, so only arrays and objects are recovered.
+        Returns the (key, value) pairs recovered.
+        """
+        completed = []
+        if self.closed or self.member_start is None:
+            return completed
+
+        member = repair_member(self.buffer[self.member_start:])
+        if member:
+            self._finish_member_text(member, completed, containers_only=True)
+        self.closed = True
+        return completed
+
+    def _finish_member_text(self, member, completed, containers_only=False):
+        try:
+            parsed = json.loads("{" + member + "}")
+        except ValueError:
+            return
+        for key, value in parsed.items():
+            if containers_only and not isinstance(value, (list, dict)):
+                continue
+            self.fields[key] = value
+            self.members += 1
+            completed.append((key, value))
+
+
+def repair_member(text):
+    """
+    Turn the truncated text of one object member into valid JSON.
+
+    Cuts back to the last point where a value was complete (a comma or an
+    opening bracket outside a string), drops the dangling comma and closes
+    the brackets still open there. Returns "" when nothing can be salvaged.
+    """
+    text = text.strip()
+    try:
+        json.loads("{" + text + "}")
+        return text
+    except ValueError:
+        pass
+
+    stack = []
+    cuts = []  # (cut position, brackets open at that position)
+    in_string = False
+    escaped = False
+
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            cuts.append((i + 1, list(stack)))
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            cuts.append((i + 1, list(stack)))
+        elif ch == "," and stack:
+            cuts.append((i, list(stack)))
+
+    for position, open_brackets in reversed(cuts):
+        candidate = text[:position].rstrip().rstrip(",") + "".join(reversed(open_brackets))
+        try:
+            json.loads("{" + candidate + "}")
+            return candidate
+        except ValueError:
+            continue
+    return ""
+
+
+def parse_partial_object(text):
+    """
+    Best-effort parse of one JSON object from LLM output that may have
+    surrounding text, stray braces after it, or be cut off mid-way.
+    Returns the top-level fields that could be recovered (possibly {}).
+    """
+    parser = ObjectFieldStream()
+    parser.feed(text or "")
+    parser.finish()
+    return dict(parser.fields)
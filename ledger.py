@@ -0,0 +1,293 @@
+import os
+import threading
+import time
+
+import requests
+
+from config import ROUTER_SECRET
+
+# Per-session caps (one interview)
+SESSION_TOKEN_CAP = int(os.getenv("SESSION_TOKEN_CAP", "20000"))
+SESSION_TTS_CHAR_CAP = int(os.getenv("SESSION_TTS_CHAR_CAP", "15000"))
+
+# Per-client caps over a rolling CLIENT_WINDOW (default one day).
+# 0 turns a cap off; all three are off by default, since behind a load
+# balancer or NAT many candidates can share one address
+CLIENT_WINDOW = int(os.getenv("CLIENT_WINDOW_SECONDS", "86400"))
+CLIENT_TOKEN_CAP = int(os.getenv("CLIENT_TOKEN_CAP", "0"))
+CLIENT_TTS_CHAR_CAP = int(os.getenv("CLIENT_TTS_CHAR_CAP", "0"))
+CLIENT_SESSION_CAP = int(os.getenv("CLIENT_SESSION_CAP", "0"))
+CLIENT_CAPS = bool(CLIENT_TOKEN_CAP or CLIENT_TTS_CHAR_CAP or CLIENT_SESSION_CAP)
+
+# Proxies in front of the service that append to X-Forwarded-For (e.g. a
+# PaaS load balancer). With N > 0 the client is the Nth address from the
+# right; anything further left was sent by the client and is ignored
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+# Set by router.py for its workers: client usage is kept by the router
+# (/router/clients/*) so the caps hold across all workers
+CLIENT_USAGE_URL = os.getenv("CLIENT_USAGE_URL")
+
+# Ledgers of sessions never closed (abandoned, never sent to /end) are
+# dropped after this long without activity
+SESSION_IDLE_TTL = int(os.getenv("LEDGER_SESSION_IDLE_SECONDS", "7200"))
+PRUNE_INTERVAL = 60
+
+_sessions = {}  # session_id -> ledger dict
+_lock = threading.Lock()
+_last_prune = 0.0
+
+
+class BudgetExceeded(Exception):
+    """A per-session or per-client cap was reached."""
+
+
+def client_address(headers, peer):
+    """The caller's address: from X-Forwarded-For behind TRUSTED_PROXY_HOPS proxies, else the peer."""
+    if TRUSTED_PROXY_HOPS:
+        hops = [h.strip() for h in headers.get("x-forwarded-for", "").split(",") if h.strip()]
+        if len(hops) >= TRUSTED_PROXY_HOPS:
+            return hops[-TRUSTED_PROXY_HOPS]
+    return peer or "unknown"
+
+
+# --------------------------------------------------
+# CLIENT USAGE (per process, or shared through the router)
+# --------------------------------------------------
+class ClientUsage:
+    """Per-client usage in the current CLIENT_WINDOW."""
+
+    def __init__(self):
+        self.clients = {}  # client_id -> usage in the current window
+        self.lock = threading.Lock()
+        self.last_prune = 0.0
+
+    def _usage(self, client_id, now):
+        if now - self.last_prune >= PRUNE_INTERVAL:
+            self.last_prune = now
+            for other, usage in list(self.clients.items()):
+                if now - usage["window_start"] >= CLIENT_WINDOW:
+                    del self.clients[other]
+        usage = self.clients.get(client_id)
+        if usage is None or now - usage["window_start"] >= CLIENT_WINDOW:
+            usage = self.clients[client_id] = {"window_start": now, "sessions": 0, "tokens": 0, "tts_chars": 0}
+        return usage
+
+    def open(self, client_id):
+        """Count a new interview; False if the client is at its session cap."""
+        with self.lock:
+            usage = self._usage(client_id, time.time())
+            if CLIENT_SESSION_CAP and usage["sessions"] >= CLIENT_SESSION_CAP:
+                return False
+            usage["sessions"] += 1
+            return True
+
+    def charge(self, client_id, tokens=0, tts_chars=0):
+        """Add usage and return a copy of the client's totals."""
+        with self.lock:
+            usage = self._usage(client_id, time.time())
+            usage["tokens"] += tokens
+            usage["tts_chars"] += tts_chars
+            return dict(usage)
+
+
+class RemoteClientUsage:
+    """ClientUsage interface backed by the router's (/router/clients/*)."""
+
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        self.headers = {"x-router-secret": ROUTER_SECRET or ""}
+
+    def _post(self, path, payload):
+        response = requests.post(f"{self.url}/{path}", json=payload, headers=self.headers, timeout=5.0)
+        response.raise_for_status()
+        return response.json()
+
+    def open(self, client_id):
+        return self._post("open", {"client_id": client_id})["allowed"]
+
+    def charge(self, client_id, tokens=0, tts_chars=0):
+        return self._post("charge", {"client_id": client_id, "tokens": tokens, "tts_chars": tts_chars})
+
+
+clients = RemoteClientUsage(CLIENT_USAGE_URL) if CLIENT_USAGE_URL else ClientUsage()
+
+
+def _charge_client(client_id, tokens=0, tts_chars=0):
+    """Client totals after charging, or None when client caps are off or unreachable."""
+    if not CLIENT_CAPS or client_id is None:
+        return None
+    try:
+        return clients.charge(client_id, tokens, tts_chars)
+    except requests.RequestException:
+        # The router keeps the totals; without it only session caps apply
+        return None
+
+
+def _prune(now):
+    """Evict idle session ledgers (call with _lock held)."""
+    global _last_prune
+    if now - _last_prune < PRUNE_INTERVAL:
+        return
+    _last_prune = now
+    for session_id, ledger in list(_sessions.items()):
+        if now - ledger["last_seen"] > SESSION_IDLE_TTL:
+            del _sessions[session_id]
+
+
+# --------------------------------------------------
+# LIFECYCLE
+# --------------------------------------------------
+def open_session(session_id, client_id):
+    """Start a ledger for a new interview. Raises BudgetExceeded if the client is over its session cap."""
+    if CLIENT_CAPS:
+        try:
+            allowed = clients.open(client_id)
+        except requests.RequestException:
+            allowed = True
+        if not allowed:
+            raise BudgetExceeded("Too many interviews started from this client")
+
+    with _lock:
+        now = time.time()
+        _prune(now)
+        _sessions[session_id] = {
+            "client_id": client_id,
+            "client_usage": None,  # latest client totals, see _charge_client
+            "llm": {},
+            "tts": {"requests": 0, "chars": 0, "bytes": 0, "latency": 0.0},
+            "stt": {"requests": 0, "audio_seconds": 0.0, "latency": 0.0},
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "upstream_latency": 0.0,
+            "degraded": False,
+            "last_seen": now,
+        }
+
+
+def close_session(session_id):
+    with _lock:
+        _sessions.pop(session_id, None)
+
+
+# --------------------------------------------------
+# RECORDING
+# --------------------------------------------------
+def _client_over_cap(usage):
+    if usage is None:
+        return False
+    return (
+        (CLIENT_TOKEN_CAP and usage["tokens"] >= CLIENT_TOKEN_CAP)
+        or (CLIENT_TTS_CHAR_CAP and usage["tts_chars"] >= CLIENT_TTS_CHAR_CAP)
+    )
+
+
+def _check_caps(ledger):
+    if ledger["degraded"]:
+        return
+    if (
+        ledger["prompt_tokens"] + ledger["completion_tokens"] >= SESSION_TOKEN_CAP
+        or ledger["tts"]["chars"] >= SESSION_TTS_CHAR_CAP
+        or _client_over_cap(ledger["client_usage"])
+    ):
+        ledger["degraded"] = True
+
+
+def _session_client(session_id):
+    with _lock:
+        ledger = _sessions.get(session_id)
+        return ledger["client_id"] if ledger is not None else None
+
+
+def record_llm(session_id, call_site, prompt_tokens, completion_tokens, latency):
+    usage = _charge_client(_session_client(session_id), tokens=prompt_tokens + completion_tokens)
+    with _lock:
+        ledger = _sessions.get(session_id)
+        if ledger is None:
+            return
+        site = ledger["llm"].setdefault(
+            call_site, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "latency": 0.0}
+        )
+        ledger["last_seen"] = time.time()
+        site["calls"] += 1
+        site["prompt_tokens"] += prompt_tokens
+        site["completion_tokens"] += completion_tokens
+        site["latency"] += latency
+
+        ledger["prompt_tokens"] += prompt_tokens
+        ledger["completion_tokens"] += completion_tokens
+        ledger["upstream_latency"] += latency
+        ledger["client_usage"] = usage or ledger["client_usage"]
+        _check_caps(ledger)
+
+
+def record_tts(session_id, chars, audio_bytes, latency, client_id=None):
+    usage = _charge_client(_session_client(session_id) or client_id, tts_chars=chars)
+    with _lock:
+        ledger = _sessions.get(session_id)
+        if ledger is None:
+            return
+        ledger["last_seen"] = time.time()
+        ledger["tts"]["requests"] += 1
+        ledger["tts"]["chars"] += chars
+        ledger["tts"]["bytes"] += audio_bytes
+        ledger["tts"]["latency"] += latency
+        ledger["upstream_latency"] += latency
+        ledger["client_usage"] = usage or ledger["client_usage"]
+        _check_caps(ledger)
+
+
+def record_stt(session_id, audio_seconds, latency):
+    with _lock:
+        ledger = _sessions.get(session_id)
+        if ledger is None:
+            return
+        ledger["last_seen"] = time.time()
+        ledger["stt"]["requests"] += 1
+        ledger["stt"]["audio_seconds"] += audio_seconds
+        ledger["stt"]["latency"] += latency
+        ledger["upstream_latency"] += latency
+
+
+# --------------------------------------------------
+# QUERIES
+# --------------------------------------------------
+def is_degraded(session_id):
+    """True once the session or its client has reached a cap."""
+    with _lock:
+        ledger = _sessions.get(session_id)
+        if ledger is None:
+            return False
+        _check_caps(ledger)
+        return ledger["degraded"]
+
+
+def tts_allowed(session_id=None, client_id=None, chars=0):
+    """Whether a /voice request of `chars` characters fits the remaining budget."""
+    with _lock:
+        ledger = _sessions.get(session_id) if session_id else None
+        if ledger is not None:
+            if ledger["tts"]["chars"] + chars > SESSION_TTS_CHAR_CAP:
+                return False
+            client_id = ledger["client_id"]
+    if not CLIENT_TTS_CHAR_CAP:
+        return True
+    usage = _charge_client(client_id)
+    return usage is None or usage["tts_chars"] + chars <= CLIENT_TTS_CHAR_CAP
+
+
+def summary(session_id):
+    """Copy of the session ledger for /end metadata."""
+    with _lock:
+        ledger = _sessions.get(session_id)
+        if ledger is None:
+            return None
+        return {
+            "llm": {site: dict(v, latency=round(v["latency"], 3)) for site, v in ledger["llm"].items()},
+            "tts": dict(ledger["tts"], latency=round(ledger["tts"]["latency"], 3)),
+            "stt": dict(ledger["stt"], latency=round(ledger["stt"]["latency"], 3)),
+            "promptTokens": ledger["prompt_tokens"],
+            "completionTokens": ledger["completion_tokens"],
+            "upstreamLatency": round(ledger["upstream_latency"], 3),
+            "degraded": ledger["degraded"],
+        }
@@ -0,0 +1,250 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+
+import requests
+from groq import Groq
+
+from config import GROQ_API_KEY, ROUTER_SECRET
+from structured_log import get_logger
+import ledger
+
+logger = get_logger("llm")
+
+# --------------------------------------------------
+# PRIORITY CLASSES
+# --------------------------------------------------
+LIVE = 0        # candidate is waiting on this turn
+CLOSING = 1     # end-of-interview replies
+ANALYSIS = 2    # final report - can wait
+
+PRIORITY_NAMES = {LIVE: "live", CLOSING: "closing", ANALYSIS: "analysis"}
+
+# Provider quota - requests and tokens per minute
+LLM_RPM = float(os.getenv("LLM_RPM", "30"))
+LLM_TPM = float(os.getenv("LLM_TPM", "6000"))
+
+# Set by router.py for its workers: admission goes through the router's
+# single scheduler, so the quota and the priority order are shared by all
+# workers instead of being split per process
+LLM_ADMISSION_URL = os.getenv("LLM_ADMISSION_URL")
+
+# Max seconds a call may wait in the queue before the caller degrades
+QUEUE_TIMEOUTS = {
+    LIVE: float(os.getenv("LLM_TIMEOUT_LIVE", "6")),
+    CLOSING: float(os.getenv("LLM_TIMEOUT_CLOSING", "10")),
+    ANALYSIS: float(os.getenv("LLM_TIMEOUT_ANALYSIS", "90")),
+}
+
+client = Groq(api_key=GROQ_API_KEY)
+
+
+class LLMQueueTimeout(Exception):
+    """The call could not be admitted within its class timeout."""
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        self._refill(now)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount):
+        self.tokens -= amount
+
+    def refund(self, amount):
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def drain(self):
+        self.tokens = min(self.tokens, 0)
+
+
+def estimate_tokens(kwargs):
+    """Rough prompt + completion size used for admission (~4 chars/token)."""
+    chars = sum(len(m.get("content") or "") for m in kwargs.get("messages", []))
+    return chars // 4 + kwargs.get("max_tokens", 256)
+
+
+class LLMScheduler:
+    """
+    Strict-priority admission for outbound LLM calls.
+
+    Waiting calls are ordered by (priority, arrival). Only the head of the
+    queue is admitted, and only when both the request and the token bucket
+    have room, so a burst of analysis calls never jumps ahead of a live turn.
+    """
+
+    def __init__(self, rpm=LLM_RPM, tpm=LLM_TPM):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.cond = threading.Condition()
+        self.waiting = []
+        self.sequence = itertools.count()
+        self.stats = {
+            p: {"queued": 0, "admitted": 0, "timed_out": 0, "wait_total": 0.0}
+            for p in PRIORITY_NAMES
+        }
+
+    def acquire(self, priority, estimate, timeout=None):
+        timeout = QUEUE_TIMEOUTS[priority] if timeout is None else timeout
+        estimate = min(estimate, self.tokens.capacity)
+        entry = (priority, next(self.sequence))
+        start = time.monotonic()
+        deadline = start + timeout
+
+        with self.cond:
+            heapq.heappush(self.waiting, entry)
+            self.stats[priority]["queued"] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self.waiting[0] == entry:
+                        delay = max(
+                            self.requests.wait_time(1, now),
+                            self.tokens.wait_time(estimate, now),
+                        )
+                        if delay == 0:
+                            heapq.heappop(self.waiting)
+                            self.requests.consume(1)
+                            self.tokens.consume(estimate)
+                            self.stats[priority]["admitted"] += 1
+                            self.stats[priority]["wait_total"] += now - start
+                            self.cond.notify_all()
+                            return now - start
+                    else:
+                        delay = deadline - now
+
+                    if now >= deadline:
+                        self.waiting.remove(entry)
+                        heapq.heapify(self.waiting)
+                        self.stats[priority]["timed_out"] += 1
+                        self.cond.notify_all()
+                        raise LLMQueueTimeout(f"{PRIORITY_NAMES[priority]} LLM call waited over {timeout}s")
+
+                    self.cond.wait(min(delay, deadline - now))
+            finally:
+                self.stats[priority]["queued"] -= 1
+
+    def reconcile(self, estimate, actual):
+        """Correct the token bucket once real usage is known."""
+        with self.cond:
+            if actual < estimate:
+                self.tokens.refund(estimate - actual)
+            else:
+                self.tokens.consume(actual - estimate)
+            self.cond.notify_all()
+
+    def throttled(self):
+        """Provider returned 429 - stop admitting until the buckets refill."""
+        with self.cond:
+            self.requests.drain()
+            self.tokens.drain()
+
+    def queue_stats(self):
+        with self.cond:
+            return {
+                PRIORITY_NAMES[p]: {
+                    "queue_depth": s["queued"],
+                    "admitted": s["admitted"],
+                    "timed_out": s["timed_out"],
+                    "avg_wait": round(s["wait_total"] / s["admitted"], 3) if s["admitted"] else 0.0,
+                }
+                for p, s in self.stats.items()
+            }
+
+
+class RemoteScheduler:
+    """
+    LLMScheduler interface backed by the router's scheduler
+    (/router/llm/*). A router that can't be reached counts as a queue
+    timeout, so callers degrade the same way.
+    """
+
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        self.headers = {"x-router-secret": ROUTER_SECRET or ""}
+
+    def _post(self, path, payload, timeout=5.0):
+        response = requests.post(f"{self.url}/{path}", json=payload, headers=self.headers, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def acquire(self, priority, estimate, timeout=None):
+        timeout = QUEUE_TIMEOUTS[priority] if timeout is None else timeout
+        try:
+            result = self._post(
+                "acquire", {"priority": priority, "estimate": estimate, "timeout": timeout}, timeout + 5.0
+            )
+        except requests.RequestException as e:
+            raise LLMQueueTimeout(f"{PRIORITY_NAMES[priority]} LLM admission failed: {e}")
+        if not result.get("admitted"):
+            raise LLMQueueTimeout(f"{PRIORITY_NAMES[priority]} LLM call waited over {timeout}s")
+        return result["waited"]
+
+    def reconcile(self, estimate, actual):
+        try:
+            self._post("reconcile", {"estimate": estimate, "actual": actual})
+        except requests.RequestException as e:
+            logger.warning("llm reconcile failed", extra={"error": str(e)})
+
+    def throttled(self):
+        try:
+            self._post("throttled", {})
+        except requests.RequestException as e:
+            logger.warning("llm throttle report failed", extra={"error": str(e)})
+
+    def queue_stats(self):
+        response = requests.get(f"{self.url}/stats", headers=self.headers, timeout=5.0)
+        response.raise_for_status()
+        return response.json()
+
+
+scheduler = RemoteScheduler(LLM_ADMISSION_URL) if LLM_ADMISSION_URL else LLMScheduler()
+
+
+def chat_completion(priority, call_site, session_id=None, timeout=None, **kwargs):
+    """
+    Admit the call through the scheduler, then run
+    client.chat.completions.create(**kwargs). Raises LLMQueueTimeout if the
+    call cannot be admitted in time - callers fall back to a cheaper reply.
+    Usage and latency are charged to the session's ledger.
+    """
+    estimate = estimate_tokens(kwargs)
+    waited = scheduler.acquire(priority, estimate, timeout)
+    started = time.monotonic()
+
+    try:
+        response = client.chat.completions.create(**kwargs)
+    except Exception as e:
+        if getattr(e, "status_code", None) == 429:
+            scheduler.throttled()
+            logger.warning("provider rate limited", extra={"call_site": call_site})
+        raise
+
+    latency = time.monotonic() - started
+    usage = getattr(response, "usage", None)
+    if usage is not None and getattr(usage, "total_tokens", None):
+        scheduler.reconcile(estimate, usage.total_tokens)
+        ledger.record_llm(session_id, call_site, usage.prompt_tokens, usage.completion_tokens, latency)
+    else:
+        # Streamed responses: charge the admission estimate
+        max_tokens = kwargs.get("max_tokens", 256)
+        ledger.record_llm(session_id, call_site, estimate - max_tokens, max_tokens, latency)
+
+    if waited > 0.5:
+        logger.info("llm call queued", extra={"call_site": call_site, "priority": PRIORITY_NAMES[priority], "waited": round(waited, 3)})
+
+    return response
@@ -1,33 +1,44 @@
-from fastapi.responses import Response, JSONResponse
-from voice_engine import speak
+from fastapi.responses import Response, JSONResponse, StreamingResponse
+from voice_engine import speak_stream, prefetch, TTSFailed
 from dotenv import load_dotenv
 load_dotenv()
+import hmac
+import json
+import queue
+import threading
 import time
-import uuid
-import random  # Added for random greeting selection
+from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
 from interview_engine import (
     get_or_create_session,
-    delete_session,
-    generate_question,
-    store_answer,
-    get_full_conversation,
-    start_closing,
-    detect_abuse,
-    generate_abuse_termination_message,
-    check_question_relevance,
-    generate_time_warning,
-    generate_closing,
-    generate_goodbye,
-    answer_candidate_question,
+    session_exists,
+    start_session,
+    process_answer,
+    finish_interview,
+    finish_interview_stream,
+    result_events,
+    expire_idle_sessions,
+    SessionNotFound,
 )
 
-from analysis_engine import analyze_interview
+from speech_engine import VoiceActivityDetector, transcribe, SAMPLE_RATE, SAMPLE_WIDTH
+from filler_engine import pick_acknowledgement, get_ack_audio, warm_ack_cache
+from idempotency import run_once, IdempotencyConflict, IdempotencyInProgress
+import idempotency
+import results_store
+import question_bank
+from structured_log import get_logger, log_stats
+from llm_scheduler import scheduler
+import ledger
+import time_scheduler
+from config import MAX_ANSWER_REQUEST_CHARS, ROUTER_SECRET, SESSION_SWEEP_SECONDS, RESULTS_ADMIN_TOKEN
 
 app = FastAPI(title="Syera AI Interview Backend")
+logger = get_logger("api")
 
 app.add_middleware(
     CORSMiddleware,
@@ -48,288 +59,408 @@ class StartInterview(BaseModel):
 class Answer(BaseModel):
     session_id: str
     text: str
+    # Stream NDJSON: an acknowledgement line first, then the next question
+    stream: bool = False
 
 
 class EndInterview(BaseModel):
     session_id: str
 
 
+def client_id(request):
+    """
+    Caller identity for per-client budgets: the X-Client-Id set by the
+    router when the request carries ROUTER_SECRET, else the caller's address
+    (see ledger.client_address for trusted proxies).
+    """
+    forwarded = request.headers.get("x-client-id")
+    secret = request.headers.get("x-router-secret")
+    if forwarded and ROUTER_SECRET and secret and hmac.compare_digest(secret, ROUTER_SECRET):
+        return forwarded
+    return ledger.client_address(request.headers, request.client.host if request.client else None)
+
+
+def session_not_found():
+    return JSONResponse(status_code=404, content={"error": "Unknown or expired session"})
+
+
+def idempotency_error(e):
+    status = 422 if isinstance(e, IdempotencyConflict) else 409
+    return JSONResponse(status_code=status, content={"error": str(e)})
+
+
+def sweep_sessions():
+    # Abandoned sessions and leftover spill files (also those from before a restart)
+    while True:
+        try:
+            expire_idle_sessions()
+        except Exception as e:
+            logger.error("session sweep error", extra={"error": str(e)})
+        time.sleep(SESSION_SWEEP_SECONDS)
+
+
+@app.on_event("startup")
+def warm_caches():
+    # Synthesize filler clips in the background so startup isn't blocked on TTS
+    threading.Thread(target=warm_ack_cache, daemon=True).start()
+    threading.Thread(target=sweep_sessions, daemon=True).start()
+
+
 # -------- START INTERVIEW --------
+# Behind router.py the session id is minted by the router (X-Session-Id) so
+# it hashes to this worker; standalone, the engine mints it.
 @app.post("/start")
-def start_interview(data: StartInterview):
-
-    # Generate unique session ID
-    session_id = f"session_{int(time.time())}_{uuid.uuid4().hex[:8]}"
-
-    # Create session
-    session = get_or_create_session(session_id)
-    session["name"] = data.name
-    session["domain"] = data.domain
-    session["start_time"] = time.time()
-
-    # Parse duration
-    if data.duration == "3":
-        session["duration_seconds"] = 3 * 60
-    elif data.duration == "10":
-        session["duration_seconds"] = 10 * 60
-    else:
-        session["duration_seconds"] = 5 * 60
-
-    # List of greeting variations
-    greetings = [
-        f"Hey Mr. {data.name.split()[0]}, welcome to your {data.domain} interview. Thanks for joining me today, I'll be conducting your interview. I am excited to get started! Can you tell me a little bit about yourself?",
-        f"Hello {data.name.split()[0]}, it's great to have you here for your {data.domain} interview. I'm thrilled to be your interviewer today. Let's dive right in—could you share a bit about your background?",
-        f"Hi {data.name.split()[0]}, welcome to the {data.domain} interview session. Thanks for participating; I'm looking forward to this. Shall we begin? Tell me a little about yourself.",
-        f"Greetings {data.name.split()[0]}, nice to meet you virtually for your {data.domain} interview. I'll be guiding you through this. Excited to learn more! Can you introduce yourself briefly?"
-    ]
-    
-    # Randomly select one
-    greeting_full = random.choice(greetings)
-    greeting_repeat = "Can you tell me a little bit about yourself?"
-
-    # Store first message in conversation
-    session["conversation"].append({
-        "role": "assistant",
-        "content": greeting_full
-    })
-
-    session["question_count"] = 1
-
-    return {
-        "session_id": session_id,
-        "question": greeting_full,
-        "repeat_question": greeting_repeat,
-        "duration": session["duration_seconds"],
-    }
+def start_interview(
+    data: StartInterview,
+    request: Request,
+    x_session_id: Optional[str] = Header(None),
+):
+    try:
+        return start_session(data.name, data.domain, data.duration, client_id(request), x_session_id)
+    except ledger.BudgetExceeded as e:
+        return JSONResponse(status_code=429, content={"error": str(e)})
+    except ValueError as e:
+        return JSONResponse(status_code=409, content={"error": str(e)})
 
 
 # -------- NEXT QUESTION (answer + get next) --------
+# Clients may send an Idempotency-Key header; retries with the same key and
+# body wait for / replay the original turn instead of storing the answer again.
+def prefetch_turns(session_id, texts):
+    """
+    Synthesize the turns the client will request next (closing, goodbye)
+    ahead of time. Skipped in degraded mode or when the session's TTS budget
+    can't cover them; sentences sent to the provider are charged like /voice.
+    """
+    def charge(chars, audio_bytes, latency):
+        ledger.record_tts(session_id, chars, audio_bytes, latency)
+
+    for text in texts:
+        if ledger.is_degraded(session_id) or not ledger.tts_allowed(session_id, chars=len(text)):
+            return
+        prefetch(text, on_synthesized=charge)
+
+
 @app.post("/answer")
-def answer_question(data: Answer):
-
-    session = get_or_create_session(data.session_id)
-    name = session.get("name", "Candidate")
-    stage = session.get("interview_stage", "technical")
-
-    # ======== STEP 1: ABUSE DETECTION ========
-    if detect_abuse(data.text):
-        session["abuse_terminated"] = True
-        store_answer(data.text, data.session_id)
-
-        termination_msg = generate_abuse_termination_message(name)
-        session["conversation"].append({
-            "role": "assistant",
-            "content": termination_msg
-        })
-
-        return {
-            "question": termination_msg,
-            "repeat_question": termination_msg,  # Same for termination
-            "question_count": session["question_count"],
-            "stage": "abuse_terminated",
-            "elapsed": int(time.time() - session.get("start_time", time.time())),
-            "action": "end_interview",
-        }
-
-    # Store candidate answer
-    store_answer(data.text, data.session_id)
-
-    elapsed = time.time() - session.get("start_time", time.time())
-    duration = session.get("duration_seconds", 300)
-    remaining = duration - elapsed
-    max_questions = max(5, int(duration / 60) * 2)
-
-    # ======== STEP 2: CANDIDATE QUESTION PHASE ========
-    # If we're in "candidate_questions" stage, the candidate is asking us questions
-    if stage == "candidate_questions":
-        candidate_text = data.text.strip().lower()
-
-        # Check if candidate has no questions
-        no_question_phrases = [
-            "no", "nope", "nothing", "no questions", "i don't have",
-            "i do not have", "that's all", "that is all", "i'm good",
-            "no thank you", "no thanks", "all good", "i am good",
-            "skip", "none",
-        ]
-
-        has_no_questions = any(phrase in candidate_text for phrase in no_question_phrases)
-
-        if has_no_questions:
-            # No questions - generate goodbye
-            goodbye_msg = generate_goodbye(name, data.session_id)
-            return {
-                "question": goodbye_msg,
-                "repeat_question": goodbye_msg,
-                "question_count": session["question_count"],
-                "stage": "final",
-                "elapsed": int(elapsed),
-                "action": "end_interview",
-            }
-        else:
-            # Candidate asked a question - check relevance
-            is_relevant, answer = check_question_relevance(
-                data.text, session.get("domain", ""), data.session_id
-            )
+def answer_question(data: Answer, idempotency_key: Optional[str] = Header(None)):
+    if not session_exists(data.session_id):
+        return session_not_found()
+    if len(data.text) > MAX_ANSWER_REQUEST_CHARS:
+        return JSONResponse(
+            status_code=413,
+            content={"error": f"Answer exceeds {MAX_ANSWER_REQUEST_CHARS} characters"}
+        )
 
-            if not is_relevant:
-                # Irrelevant question - note it, answer politely, then goodbye
-                full_reply = (
-                    f"{answer} "
-                    f"Alright {name}, thank you for your time today. "
-                    f"Best of luck with everything, {name}! Have a great day. Goodbye."
-                )
-                session["conversation"].append({
-                    "role": "assistant",
-                    "content": full_reply
-                })
-                return {
-                    "question": full_reply,
-                    "repeat_question": full_reply,
-                    "question_count": session["question_count"],
-                    "stage": "final",
-                    "elapsed": int(elapsed),
-                    "action": "end_interview",
-                    "irrelevant_question": True,
-                }
-            else:
-                # Relevant question - answer it, then say goodbye
-                full_reply = (
-                    f"{answer} "
-                    f"Thank you for that great question, {name}. "
-                    f"It was a pleasure speaking with you today. "
-                    f"We will review your interview and get back to you soon. "
-                    f"Best of luck, {name}! Have a wonderful day. Goodbye."
-                )
-                session["conversation"].append({
-                    "role": "assistant",
-                    "content": full_reply
-                })
-                return {
-                    "question": full_reply,
-                    "repeat_question": full_reply,
-                    "question_count": session["question_count"],
-                    "stage": "final",
-                    "elapsed": int(elapsed),
-                    "action": "end_interview",
-                }
-
-    # ======== STEP 3: TIME-AWARE QUESTION FLOW ========
-    # "time_warning_given" tracks if we already warned the candidate
-    time_warning_given = session.get("time_warning_given", False)
-
-    # If very little time left (under 15s) and not yet closing, transition gracefully
-    # But do NOT cut off mid-answer - we already accepted their answer above
-    if remaining <= 15 and not time_warning_given and stage == "technical":
-        session["time_warning_given"] = True
-        # Instead of hard-stopping, move to closing which asks for candidate questions
-        start_closing(data.session_id)
-
-        # Generate the closing message (asks if candidate has questions)
-        closing_msg = generate_closing(name, data.session_id)
-
-        return {
-            "question": closing_msg,
-            "repeat_question": closing_msg,
-            "question_count": session["question_count"],
-            "stage": "candidate_questions",
-            "elapsed": int(elapsed),
-        }
-
-    # Normal flow: check if we should start closing
-    if (remaining <= 30 and stage == "technical") or session["question_count"] >= max_questions:
-        start_closing(data.session_id)
-
-    # Generate next question (interview_engine handles closing stage internally)
-    next_question = generate_question(
-        session["domain"],
-        name,
-        data.session_id
+    payload = {"session_id": data.session_id, "text": data.text}
+
+    def turn():
+        result = process_answer(data.session_id, data.text)
+        # Inside run_once so a replayed request doesn't synthesize again
+        prefetch_turns(data.session_id, result.get("prefetch", []))
+        return result
+
+    def run_turn():
+        return run_once("answer", idempotency_key, payload, turn)
+
+    if not data.stream:
+        try:
+            return run_turn()
+        except (IdempotencyConflict, IdempotencyInProgress) as e:
+            return idempotency_error(e)
+
+    stage = get_or_create_session(data.session_id).get("interview_stage", "technical")
+    ack = pick_acknowledgement(data.text, stage)
+
+    def events():
+        # Sent before any LLM work so the client can play it right away
+        if ack:
+            yield json.dumps({"type": "ack", **ack, "audio_url": f"/ack/{ack['id']}"}) + "\n"
+        try:
+            result = run_turn()
+        except (IdempotencyConflict, IdempotencyInProgress) as e:
+            yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+            return
+        yield json.dumps({"type": "question", **result}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+# -------- ACKNOWLEDGEMENT AUDIO --------
+@app.get("/ack/{clip_id}")
+def ack_audio(clip_id: str):
+    audio = get_ack_audio(clip_id)
+    if audio is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Unknown acknowledgement clip"}
+        )
+
+    return Response(
+        content=audio,
+        media_type="audio/mpeg",
+        headers={"Cache-Control": "public, max-age=86400"}
     )
 
-    return {
-        "question": next_question['full'],
-        "repeat_question": next_question['repeat'],
-        "question_count": session["question_count"],
-        "stage": session["interview_stage"],
-        "elapsed": int(elapsed),
-    }
+
+# -------- STREAMING ANSWER (audio in, endpointing on server) --------
+# Protocol:
+#   1. Connect with ?session_id=... (or send {"session_id": ...} as first text frame)
+#   2. Send binary frames of 16kHz 16-bit mono PCM while the candidate speaks
+#   3. Server detects end of speech, transcribes, and replies with the next turn
+#   Optional text frame {"type": "end_of_speech"} forces the endpoint (push-to-talk).
+@app.websocket("/answer/stream")
+async def answer_stream(websocket: WebSocket):
+    await websocket.accept()
+
+    session_id = websocket.query_params.get("session_id")
+    if not session_id:
+        first = await websocket.receive_json()
+        session_id = first.get("session_id")
+    if not session_id or not session_exists(session_id):
+        await websocket.close(code=1008, reason="valid session_id required")
+        return
+
+    detector = VoiceActivityDetector()
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            endpoint = False
+            if message.get("bytes"):
+                endpoint = detector.feed(message["bytes"])
+            elif message.get("text"):
+                control = json.loads(message["text"])
+                endpoint = control.get("type") == "end_of_speech" and detector.has_speech()
+
+            if not endpoint:
+                continue
+
+            audio = detector.take_audio()
+            await websocket.send_json({"type": "endpoint"})
+
+            started = time.monotonic()
+            text = await run_in_threadpool(transcribe, audio)
+            ledger.record_stt(session_id, len(audio) / (SAMPLE_RATE * SAMPLE_WIDTH), time.monotonic() - started)
+            if not text:
+                await websocket.send_json({"type": "no_speech"})
+                continue
+
+            await websocket.send_json({"type": "transcript", "text": text})
+
+            stage = get_or_create_session(session_id).get("interview_stage", "technical")
+            ack = pick_acknowledgement(text, stage)
+            if ack:
+                await websocket.send_json({"type": "ack", **ack, "audio_url": f"/ack/{ack['id']}"})
+
+            result = await run_in_threadpool(process_answer, session_id, text)
+            await run_in_threadpool(prefetch_turns, session_id, result.get("prefetch", []))
+            await websocket.send_json({"type": "question", **result})
+
+            if result.get("action") == "end_interview":
+                await websocket.close()
+                break
+
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error("answer stream error", extra={"session_id": session_id, "stage": "answer", "error": str(e)})
+        await websocket.close(code=1011)
 
 
 # -------- END INTERVIEW --------
+END_FALLBACK = {
+    "analysis": {
+        "technical_score": 70,
+        "communication_score": 70,
+        "confidence_score": 70,
+        "overall_score": 70,
+        "strengths": ["Interview completed"],
+        "weaknesses": ["Analysis failed"],
+        "suggestions": ["Please try again"]
+    },
+    "metadata": {
+        "candidateName": "",
+        "domain": "",
+        "totalQuestions": 0,
+        "duration": 0,
+        "configuredDuration": 0,
+    },
+    "conversation": [],
+}
+
+
+# Finishing is always deduplicated per session (scope "end", key session_id),
+# shared with /end/stream, so concurrent or retried calls run analysis once.
+# An Idempotency-Key header is honoured on top of that.
 @app.post("/end")
-def end_interview(data: EndInterview):
+def end_interview(data: EndInterview, idempotency_key: Optional[str] = Header(None)):
+    payload = {"session_id": data.session_id}
+
+    def finish_once():
+        return run_once("end", data.session_id, payload, lambda: finish_interview(data.session_id))
 
     try:
-        session = get_or_create_session(data.session_id)
-        conv = get_full_conversation(data.session_id)
-
-        elapsed = time.time() - session.get("start_time", time.time())
-
-        # Pass metadata to the analysis engine so it can properly evaluate
-        # incomplete/short interviews
-        analysis_metadata = {
-            "name": session.get("name", "Candidate"),
-            "total_questions": session.get("question_count", 0),
-            "configured_duration": session.get("duration_seconds", 300),
-            "actual_duration": int(elapsed),
-            "early_exit": elapsed < (session.get("duration_seconds", 300) * 0.5),
-        }
-
-        analysis = analyze_interview(conv, metadata=analysis_metadata)
-
-        # If terminated due to abuse, reduce all scores significantly
-        if session.get("abuse_terminated", False):
-            analysis["technical_score"] = min(analysis.get("technical_score", 0), 20)
-            analysis["communication_score"] = min(analysis.get("communication_score", 0), 10)
-            analysis["confidence_score"] = min(analysis.get("confidence_score", 0), 15)
-            analysis["overall_score"] = min(analysis.get("overall_score", 0), 15)
-            analysis.setdefault("weaknesses", []).insert(0, "Interview terminated due to use of inappropriate language")
-            analysis.setdefault("suggestions", []).insert(0, "Maintain professional language and conduct during interviews")
-
-        result = {
-            "analysis": analysis,
-            "metadata": {
-                "candidateName": session.get("name", ""),
-                "domain": session.get("domain", ""),
-                "totalQuestions": session.get("question_count", 0),
-                "duration": int(elapsed),
-                "configuredDuration": session.get("duration_seconds", 300),
-                "abuseTerminated": session.get("abuse_terminated", False),
-            },
-            "conversation": conv,
-        }
-
-        # Clean up session
-        delete_session(data.session_id)
+        return run_once("end-key", idempotency_key, payload, finish_once)
 
-        return result
+    except (IdempotencyConflict, IdempotencyInProgress) as e:
+        return idempotency_error(e)
+
+    except SessionNotFound:
+        return session_not_found()
 
     except Exception as e:
-        print("END INTERVIEW ERROR:", e)
-
-        return {
-            "analysis": {
-                "technical_score": 70,
-                "communication_score": 70,
-                "confidence_score": 70,
-                "overall_score": 70,
-                "strengths": ["Interview completed"],
-                "weaknesses": ["Analysis failed"],
-                "suggestions": ["Please try again"]
-            },
-            "metadata": {
-                "candidateName": "",
-                "domain": "",
-                "totalQuestions": 0,
-                "duration": 0,
-                "configuredDuration": 0,
-            },
-            "conversation": [],
-        }
+        logger.error("end interview error", extra={"session_id": data.session_id, "stage": "end", "error": str(e)})
+
+        return END_FALLBACK
+
+
+# Streams the /end result: metadata and conversation immediately, then each
+# analysis field as the LLM produces it. NDJSON by default, SSE when the
+# client sends "Accept: text/event-stream".
+@app.post("/end/stream")
+def end_interview_stream(data: EndInterview, request: Request):
+    sse = "text/event-stream" in request.headers.get("accept", "")
+
+    def encode(event):
+        if sse:
+            return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        return json.dumps(event) + "\n"
+
+    def events():
+        # Same per-session entry as /end: only the owner runs the analysis,
+        # a concurrent retry waits and replays the owner's result
+        try:
+            owner, entry = idempotency.claim("end", data.session_id, {"session_id": data.session_id})
+        except IdempotencyConflict as e:
+            yield encode({"type": "error", "error": str(e)})
+            return
+
+        if not owner:
+            try:
+                yield from map(encode, result_events(idempotency.wait(entry)))
+            except SessionNotFound:
+                yield encode({"type": "error", "error": "Unknown or expired session"})
+            except Exception as e:
+                yield encode({"type": "error", "error": str(e)})
+            return
+
+        # The analysis runs on its own thread so a client that disconnects
+        # mid-stream doesn't abandon it: the result is still stored and the
+        # entry completed for the retry
+        updates = queue.Queue()
+
+        def analyze():
+            result = {}
+            try:
+                for event in finish_interview_stream(data.session_id):
+                    if event["type"] == "conversation":
+                        result["conversation"] = event["conversation"]
+                    elif event["type"] == "done":
+                        result.update(analysis=event["analysis"], metadata=event["metadata"])
+                    updates.put(event)
+                idempotency.complete(entry, result)
+            except BaseException as e:
+                idempotency.fail(entry, e)
+                updates.put(e)
+            finally:
+                updates.put(None)
+
+        threading.Thread(target=analyze, daemon=True).start()
+
+        while True:
+            event = updates.get()
+            if event is None:
+                return
+            if isinstance(event, SessionNotFound):
+                yield encode({"type": "error", "error": "Unknown or expired session"})
+            elif isinstance(event, BaseException):
+                logger.error("end interview stream error", extra={"session_id": data.session_id, "stage": "end", "error": str(event)})
+                yield encode({"type": "error", "error": "Analysis failed"})
+                yield encode({"type": "done", **END_FALLBACK})
+            else:
+                yield encode(event)
+
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type)
+
+
+# -------- STORED RESULTS --------
+# Admin only: these expose every candidate's name, scores and transcript.
+def admin_denied(authorization):
+    """None if `authorization` is "Bearer <RESULTS_ADMIN_TOKEN>", else the error response."""
+    if not RESULTS_ADMIN_TOKEN:
+        return JSONResponse(status_code=404, content={"error": "Not found"})
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip(), RESULTS_ADMIN_TOKEN):
+        return JSONResponse(
+            status_code=401,
+            content={"error": "Admin token required"},
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return None
+
+
+@app.get("/results/percentile")
+def result_percentile(domain: str, score: float, authorization: Optional[str] = Header(None)):
+    denied = admin_denied(authorization)
+    if denied:
+        return denied
+    return {
+        "domain": domain,
+        "score": score,
+        "percentile": results_store.percentile(domain, score),
+    }
+
+
+@app.get("/results/domain")
+def result_domain_summary(domain: str, authorization: Optional[str] = Header(None)):
+    denied = admin_denied(authorization)
+    if denied:
+        return denied
+    return results_store.domain_summary(domain)
+
+
+@app.get("/results/export")
+def result_export(
+    domain: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    min_score: Optional[int] = None,
+    cursor: int = 0,
+    limit: int = 100,
+    include_conversation: bool = False,
+    authorization: Optional[str] = Header(None),
+):
+    denied = admin_denied(authorization)
+    if denied:
+        return denied
+    return results_store.export_results(
+        domain=domain, since=since, until=until, min_score=min_score,
+        cursor=cursor, limit=limit, include_conversation=include_conversation,
+    )
+
 
+@app.get("/results/{session_id}")
+def result_detail(session_id: str, authorization: Optional[str] = Header(None)):
+    denied = admin_denied(authorization)
+    if denied:
+        return denied
+    result = results_store.get_result(session_id)
+    if result is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Result not found"}
+        )
+    return result
 
+
+# Long replies are split into sentences that are synthesized concurrently and
+# streamed in order, so playback starts as soon as the first sentence is ready.
 @app.post("/voice")
-def voice_api(data: dict):
+def voice_api(data: dict, request: Request):
     text = data.get("text", "")
     if not text:
         return JSONResponse(
@@ -337,32 +468,72 @@ def voice_api(data: dict):
             content={"error": "No text provided"}
         )
 
+    # Charged to the interview when session_id is sent, else to the caller
+    session_id = data.get("session_id")
+    caller = client_id(request)
+    if not ledger.tts_allowed(session_id, caller, len(text)):
+        return JSONResponse(
+            status_code=429,
+            content={"error": "TTS budget reached", "fallback": "browser_tts"}
+        )
+
     try:
-        audio = speak(text)
+        started = time.monotonic()
+        # Only sentences sent to the provider are charged: banked questions
+        # and sentences already synthesized (e.g. by prefetch_turns) are not
+        synthesized = []
+        chunks = speak_stream(
+            text, lookup=question_bank.banked_audio,
+            on_synthesized=lambda chars, audio_bytes, latency: synthesized.append(chars)
+        )
+        first = next(chunks, None)
 
-        if audio is None:
-            print("VOICE ERROR: speak() returned None for text:", text[:50])
+        if first is None:
+            logger.error("no audio generated", extra={"stage": "voice", "text": text[:50]})
             return JSONResponse(
                 status_code=500,
                 content={"error": "TTS failed to generate audio"}
             )
 
-        return Response(
-            content=audio,
+        def audio_stream():
+            sent = len(first)
+            try:
+                yield first
+                # A later sentence failing (TTSFailed) aborts the response
+                # instead of playing the turn with a sentence missing
+                for chunk in chunks:
+                    sent += len(chunk)
+                    yield chunk
+            except TTSFailed as e:
+                logger.error("voice stream aborted", extra={"stage": "voice", "error": str(e)})
+                raise
+            finally:
+                latency = time.monotonic() - started
+                ledger.record_tts(session_id, sum(synthesized), sent, latency, caller)
+            time_scheduler.record("tts", latency, session_id)
+
+        return StreamingResponse(
+            audio_stream(),
             media_type="audio/mpeg"
         )
     except Exception as e:
-        print("VOICE ENDPOINT ERROR:", e)
+        logger.error("voice endpoint error", extra={"stage": "voice", "error": str(e)})
         return JSONResponse(
             status_code=500,
             content={"error": f"TTS error: {str(e)}"}
         )
 
 
+# -------- LLM ADMISSION QUEUE --------
+@app.get("/llm/queue")
+def llm_queue():
+    return scheduler.queue_stats()
+
+
 # -------- HEALTH CHECK --------
 @app.get("/health")
 def health_check():
-    return {"status": "ok", "service": "Syera AI Interview Backend"}
+    return {"status": "ok", "service": "Syera AI Interview Backend", "logging": log_stats()}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,141 @@
+import bisect
+import math
+
+
+class TDigest:
+    """
+    Merging t-digest for streaming quantiles.
+
+    Keeps at most ~compression centroids no matter how many values were
+    added, so cdf() / quantile() cost is bounded by the compression, not by
+    the number of interviews. Inserts are buffered and merged in batches.
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.centroids = []  # sorted [mean, weight] pairs
+        self.buffer = []
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value, weight=1):
+        value = float(value)
+        self.buffer.append([value, weight])
+        self.total += weight
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+        if len(self.buffer) >= self.compression * 5:
+            self._merge()
+
+    def _scale(self, q):
+        # k1 scale function: small centroids at the tails, large in the middle
+        q = min(1.0, max(0.0, q))
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _merge(self):
+        if not self.buffer:
+            return
+
+        points = sorted(self.centroids + self.buffer)
+        self.buffer = []
+
+        merged = []
+        cumulative = 0  # weight of all centroids before merged[-1]
+        for mean, weight in points:
+            if merged:
+                last = merged[-1]
+                q_left = cumulative / self.total
+                q_right = (cumulative + last[1] + weight) / self.total
+                if self._scale(q_right) - self._scale(q_left) <= 1:
+                    combined = last[1] + weight
+                    last[0] += (mean - last[0]) * weight / combined
+                    last[1] = combined
+                    continue
+                cumulative += last[1]
+            merged.append([mean, weight])
+
+        self.centroids = merged
+
+    def cdf(self, value):
+        """
+        Fraction of added values below `value` (0.0 - 1.0), or None if empty.
+        Values equal to `value` count half (midpoint rank), so the top of a
+        distribution scores just under 1.0 rather than exactly 1.0.
+        """
+        self._merge()
+        if not self.total:
+            return None
+        if value < self.min:
+            return 0.0
+        if value > self.max:
+            return 1.0
+
+        # min and max are single values, ranked at their midpoints
+        prev_mean, prev_rank = self.min, 0.5
+        cumulative = 0
+        for i, (mean, weight) in enumerate(self.centroids):
+            if value == mean:
+                equal = 0
+                for other, other_weight in self.centroids[i:]:
+                    if other != mean:
+                        break
+                    equal += other_weight
+                return (cumulative + equal / 2) / self.total
+            center = cumulative + weight / 2
+            if value < mean:
+                fraction = (value - prev_mean) / (mean - prev_mean)
+                return (prev_rank + fraction * (center - prev_rank)) / self.total
+            prev_mean, prev_rank = mean, center
+            cumulative += weight
+
+        fraction = (value - prev_mean) / (self.max - prev_mean)
+        return (prev_rank + fraction * (self.total - 0.5 - prev_rank)) / self.total
+
+    def quantile(self, q):
+        """Approximate value at quantile q (0.0 - 1.0), or None if empty."""
+        self._merge()
+        if not self.total:
+            return None
+
+        target = q * self.total
+        centers = []
+        cumulative = 0
+        for mean, weight in self.centroids:
+            centers.append(cumulative + weight / 2)
+            cumulative += weight
+
+        index = bisect.bisect_left(centers, target)
+        if index == 0:
+            lo_rank, lo_mean = 0.0, self.min
+            hi_rank, hi_mean = centers[0], self.centroids[0][0]
+        elif index == len(centers):
+            lo_rank, lo_mean = centers[-1], self.centroids[-1][0]
+            hi_rank, hi_mean = self.total, self.max
+        else:
+            lo_rank, lo_mean = centers[index - 1], self.centroids[index - 1][0]
+            hi_rank, hi_mean = centers[index], self.centroids[index][0]
+
+        if hi_rank == lo_rank:
+            return lo_mean
+        return lo_mean + (target - lo_rank) / (hi_rank - lo_rank) * (hi_mean - lo_mean)
+
+    def to_dict(self):
+        self._merge()
+        return {
+            "compression": self.compression,
+            "centroids": self.centroids,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        digest = cls(data.get("compression", 100))
+        digest.centroids = [list(c) for c in data.get("centroids", [])]
+        digest.total = data.get("total", 0)
+        digest.min = data.get("min")
+        digest.max = data.get("max")
+        return digest
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import random
+
+from analysis_engine import DONT_KNOW_PHRASES
+from config import QUESTION_BANK_DIR
+from results_store import domain_key
+from structured_log import get_logger
+
+# Introductions mentioning these deserve an LLM follow-up about the project
+TAILORED_KEYWORDS = [
+    "project", "built", "developed", "designed", "implemented", "internship",
+    "intern", "worked on", "working on", "experience in", "created",
+]
+
+# Used when the LLM can't be reached in time and the bank has nothing left
+GENERIC_QUESTIONS = [
+    "Can you walk me through a technical challenge you faced recently and how you solved it?",
+    "Which tools or technologies do you use most in your work, and why?",
+    "How do you usually debug a problem you have never seen before?",
+    "Can you describe a project you are proud of and your role in it?",
+]
+
+# question_count at generation time -> bank level
+LEVEL_BY_QUESTION = {1: "opening", 2: "early"}
+
+_bank = None
+logger = get_logger("question_bank")
+
+
+def audio_key(text):
+    return hashlib.sha1(text.strip().encode("utf-8")).hexdigest()
+
+
+def audio_path(text):
+    return os.path.join(QUESTION_BANK_DIR, "audio", f"{audio_key(text)}.mp3")
+
+
+def load_bank():
+    """Load bank.json once. Missing bank = every question goes to the LLM."""
+    global _bank
+    if _bank is None:
+        path = os.path.join(QUESTION_BANK_DIR, "bank.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                _bank = json.load(f).get("domains", {})
+        except FileNotFoundError:
+            _bank = {}
+        except Exception as e:
+            logger.error("question bank load error", extra={"path": path, "error": str(e)})
+            _bank = {}
+    return _bank
+
+
+def needs_tailored_followup(answer):
+    """Whether the last answer should get an LLM-written follow-up instead."""
+    lower = answer.lower()
+    if any(phrase in lower for phrase in DONT_KNOW_PHRASES):
+        return True  # LLM explains the answer before moving on
+    return any(word in lower for word in TAILORED_KEYWORDS)
+
+
+def pick_question(session):
+    """
+    Return a banked question for the session's next turn, or None.
+    Only the first one or two technical questions are served from the bank.
+    """
+    level = LEVEL_BY_QUESTION.get(session.get("question_count"))
+    if level is None:
+        return None
+
+    entry = load_bank().get(domain_key(session.get("domain")))
+    if not entry or not entry.get(level):
+        return None
+
+    conv = session["conversation"]
+    last_answer = conv[-1]["content"] if conv and conv[-1]["role"] == "user" else ""
+    if needs_tailored_followup(last_answer):
+        return None
+
+    served = session.setdefault("bank_served", [])
+    choices = [q for q in entry[level] if q not in served]
+    if not choices:
+        return None
+
+    question = random.choice(choices)
+    served.append(question)
+    return question
+
+
+def fallback_question(session, domain):
+    """Any unused banked question for the domain, else a generic one."""
+    entry = load_bank().get(domain_key(domain)) or {}
+    served = session.setdefault("bank_served", [])
+    choices = [q for level in LEVEL_BY_QUESTION.values() for q in entry.get(level, []) if q not in served]
+    choices = choices or [q for q in GENERIC_QUESTIONS if q not in served] or GENERIC_QUESTIONS
+    question = random.choice(choices)
+    served.append(question)
+    return question
+
+
+def banked_audio(text):
+    """Pre-synthesized audio for a banked question, or None."""
+    path = audio_path(text)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
@@ -0,0 +1,233 @@
+import json
+import sqlite3
+import threading
+import time
+
+from config import RESULTS_DB_PATH
+from quantile_sketch import TDigest
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT UNIQUE NOT NULL,
+    candidate_name TEXT,
+    domain TEXT,
+    domain_key TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    overall_score INTEGER,
+    technical_score INTEGER,
+    communication_score INTEGER,
+    confidence_score INTEGER,
+    abuse_terminated INTEGER DEFAULT 0,
+    analysis TEXT,
+    metadata TEXT,
+    conversation TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_domain_created ON results(domain_key, created_at);
+CREATE INDEX IF NOT EXISTS idx_results_domain_overall ON results(domain_key, overall_score);
+CREATE INDEX IF NOT EXISTS idx_results_created ON results(created_at);
+CREATE INDEX IF NOT EXISTS idx_results_overall ON results(overall_score);
+
+CREATE TABLE IF NOT EXISTS domain_digests (
+    domain_key TEXT PRIMARY KEY,
+    digest TEXT NOT NULL
+);
+"""
+
+MAX_EXPORT_PAGE = 500
+
+_conn = None
+_lock = threading.Lock()
+_digests = {}  # domain_key -> TDigest (overall_score distribution)
+_data_version = None  # PRAGMA data_version when _digests was last known fresh
+
+
+def domain_key(domain):
+    return " ".join((domain or "").lower().split())
+
+
+def _db():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(RESULTS_DB_PATH, check_same_thread=False)
+        _conn.row_factory = sqlite3.Row
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.executescript(SCHEMA)
+    return _conn
+
+
+def _load_digest(conn, key):
+    """Fetch the digest for a domain, rebuilding it from history if missing."""
+    if key in _digests:
+        return _digests[key]
+
+    digest = _reload_digest(conn, key)
+    if digest is None:
+        digest = TDigest()
+        for r in conn.execute(
+            "SELECT overall_score FROM results WHERE domain_key = ? AND overall_score IS NOT NULL", (key,)
+        ):
+            digest.add(r["overall_score"])
+
+    _digests[key] = digest
+    return digest
+
+
+def _fresh_digest(conn, key):
+    """
+    _load_digest, but first drop the cache if another process (another
+    router worker) has committed to the database since it was filled.
+    """
+    global _data_version
+    version = conn.execute("PRAGMA data_version").fetchone()[0]
+    if version != _data_version:
+        _digests.clear()
+        _data_version = version
+    return _load_digest(conn, key)
+
+
+def _reload_digest(conn, key):
+    row = conn.execute("SELECT digest FROM domain_digests WHERE domain_key = ?", (key,)).fetchone()
+    if row is None:
+        return None
+    _digests[key] = TDigest.from_dict(json.loads(row["digest"]))
+    return _digests[key]
+
+
+# --------------------------------------------------
+# WRITE
+# --------------------------------------------------
+def record_result(session_id, result):
+    """Store a finished interview (/end payload) and update the domain sketch."""
+    analysis = result.get("analysis", {})
+    metadata = result.get("metadata", {})
+    key = domain_key(metadata.get("domain"))
+    overall = analysis.get("overall_score")
+
+    with _lock:
+        conn = _db()
+        digest = _load_digest(conn, key)
+        with conn:
+            inserted = conn.execute(
+                """
+                INSERT INTO results (
+                    session_id, candidate_name, domain, domain_key, created_at,
+                    overall_score, technical_score, communication_score, confidence_score,
+                    abuse_terminated, analysis, metadata, conversation
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(session_id) DO NOTHING
+                """,
+                (
+                    session_id,
+                    metadata.get("candidateName", ""),
+                    metadata.get("domain", ""),
+                    key,
+                    time.time(),
+                    overall,
+                    analysis.get("technical_score"),
+                    analysis.get("communication_score"),
+                    analysis.get("confidence_score"),
+                    int(bool(metadata.get("abuseTerminated", False))),
+                    json.dumps(analysis),
+                    json.dumps(metadata),
+                    json.dumps(list(result.get("conversation", []))),
+                ),
+            ).rowcount
+            # Only count each interview once in the sketch
+            if inserted and overall is not None:
+                # Other worker processes may have updated the stored digest;
+                # reload it under this write transaction before adding
+                digest = _reload_digest(conn, key) or digest
+                digest.add(overall)
+                conn.execute(
+                    "INSERT OR REPLACE INTO domain_digests (domain_key, digest) VALUES (?, ?)",
+                    (key, json.dumps(digest.to_dict())),
+                )
+
+
+# --------------------------------------------------
+# READ
+# --------------------------------------------------
+def percentile(domain, score):
+    """
+    Percentage of stored candidates in `domain` scoring below `score`, ties
+    counting half. Call it before record_result so the candidate is not
+    ranked against themselves. Answered from the domain's t-digest, so cost
+    does not grow with history. Returns None if the domain has no results yet.
+    """
+    with _lock:
+        digest = _fresh_digest(_db(), domain_key(domain))
+        fraction = digest.cdf(score)
+    return None if fraction is None else round(fraction * 100, 1)
+
+
+def domain_summary(domain):
+    with _lock:
+        digest = _fresh_digest(_db(), domain_key(domain))
+        return {
+            "domain": domain,
+            "count": digest.total,
+            "p25": digest.quantile(0.25),
+            "median": digest.quantile(0.5),
+            "p75": digest.quantile(0.75),
+            "p90": digest.quantile(0.9),
+        }
+
+
+def _row_to_result(row, include_conversation=True):
+    item = {
+        "id": row["id"],
+        "session_id": row["session_id"],
+        "candidateName": row["candidate_name"],
+        "domain": row["domain"],
+        "created_at": row["created_at"],
+        "analysis": json.loads(row["analysis"] or "{}"),
+        "metadata": json.loads(row["metadata"] or "{}"),
+    }
+    if include_conversation:
+        item["conversation"] = json.loads(row["conversation"] or "[]")
+    return item
+
+
+def get_result(session_id):
+    with _lock:
+        row = _db().execute("SELECT * FROM results WHERE session_id = ?", (session_id,)).fetchone()
+    return _row_to_result(row) if row else None
+
+
+def export_results(domain=None, since=None, until=None, min_score=None,
+                   cursor=0, limit=100, include_conversation=False):
+    """
+    Keyset-paginated export ordered by id.
+    Pass the returned `next_cursor` back as `cursor` to get the next page.
+    """
+    limit = max(1, min(limit, MAX_EXPORT_PAGE))
+    clauses = ["id > ?"]
+    params = [cursor or 0]
+
+    if domain:
+        clauses.append("domain_key = ?")
+        params.append(domain_key(domain))
+    if since is not None:
+        clauses.append("created_at >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("created_at < ?")
+        params.append(until)
+    if min_score is not None:
+        clauses.append("overall_score >= ?")
+        params.append(min_score)
+
+    columns = "*" if include_conversation else (
+        "id, session_id, candidate_name, domain, created_at, analysis, metadata"
+    )
+    query = f"SELECT {columns} FROM results WHERE {' AND '.join(clauses)} ORDER BY id LIMIT ?"
+    params.append(limit)
+
+    with _lock:
+        rows = _db().execute(query, params).fetchall()
+
+    return {
+        "results": [_row_to_result(r, include_conversation) for r in rows],
+        "next_cursor": rows[-1]["id"] if len(rows) == limit else None,
+    }
@@ -0,0 +1,501 @@
+import asyncio
+import bisect
+import hashlib
+import hmac
+import itertools
+import json
+import os
+import secrets
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import websockets
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+import ledger
+from llm_scheduler import LLMScheduler, LLMQueueTimeout
+from structured_log import get_logger
+
+logger = get_logger("router")
+
+# --------------------------------------------------
+# SETTINGS
+# --------------------------------------------------
+# Session state lives in each worker's memory, so every request for a
+# session must reach the worker that ran its /start.
+# Each worker runs its sessions' CPU work (VAD, parsing) in one process, so
+# default to one worker per core; the shared LLM scheduler keeps the
+# provider quota the same however many there are
+ROUTER_WORKERS = int(os.getenv("ROUTER_WORKERS", str(os.cpu_count() or 1)))
+WORKER_BASE_PORT = int(os.getenv("WORKER_BASE_PORT", "8100"))
+VIRTUAL_NODES = int(os.getenv("ROUTER_VIRTUAL_NODES", "160"))
+HEALTH_INTERVAL = float(os.getenv("ROUTER_HEALTH_INTERVAL", "2"))
+# A draining worker is restarted once its sessions end, or after this long
+DRAIN_TIMEOUT = float(os.getenv("ROUTER_DRAIN_TIMEOUT", "900"))
+# Sessions never sent to /end are forgotten after this long
+SESSION_MAX_AGE = float(os.getenv("ROUTER_SESSION_MAX_AGE", "3600"))
+
+# Proves to the workers that X-Client-Id was set by the router (see
+# config.ROUTER_SECRET); generated per run unless configured
+ROUTER_SECRET = os.getenv("ROUTER_SECRET") or secrets.token_hex(32)
+
+# Workers admit LLM calls through this process's scheduler (/router/llm/*),
+# so the whole LLM_RPM / LLM_TPM quota and the LIVE > CLOSING > ANALYSIS
+# order are shared by all workers
+ADMISSION_URL = os.getenv("ROUTER_ADMISSION_URL") or f"http://127.0.0.1:{os.getenv('PORT', '8000')}/router/llm"
+# Per-client usage (ledger.CLIENT_* caps) is kept here too, see /router/clients/*
+CLIENT_USAGE_URL = os.getenv("ROUTER_CLIENT_USAGE_URL") or f"http://127.0.0.1:{os.getenv('PORT', '8000')}/router/clients"
+# Threads for admission requests blocked waiting in the queue
+ADMISSION_THREADS = int(os.getenv("ROUTER_ADMISSION_THREADS", "256"))
+
+HOP_BY_HOP = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade", "content-length", "host",
+}
+
+
+def new_session_id():
+    # Same format as interview_engine.new_session_id (checked against
+    # SESSION_ID_PATTERN by /start); kept here so the router stays free of
+    # the engine's session, TTS and analysis imports
+    return f"session_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+
+
+# --------------------------------------------------
+# CONSISTENT HASH RING
+# --------------------------------------------------
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Maps session ids to worker names. Each worker owns VIRTUAL_NODES points
+    on the ring, so load is even and membership changes only move the
+    sessions of the worker that changed.
+    """
+
+    def __init__(self, nodes, replicas=VIRTUAL_NODES):
+        self.points = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(replicas))
+        self.keys = [point for point, _ in self.points]
+
+    def node_for(self, key):
+        index = bisect.bisect(self.keys, _hash(key)) % len(self.keys)
+        return self.points[index][1]
+
+
+# --------------------------------------------------
+# WORKERS
+# --------------------------------------------------
+class Worker:
+    def __init__(self, name, port):
+        self.name = name
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.process = None
+        self.healthy = False
+        self.draining = False
+        self.drain_started = None
+        self.sessions = {}  # session_id -> start time, for sessions begun via the router
+        self.restarts = 0
+
+    @property
+    def accepting(self):
+        """Whether new interviews may be placed on this worker."""
+        return self.healthy and not self.draining
+
+    def spawn(self):
+        env = dict(
+            os.environ,
+            LLM_ADMISSION_URL=ADMISSION_URL,
+            CLIENT_USAGE_URL=CLIENT_USAGE_URL,
+            ROUTER_SECRET=ROUTER_SECRET,
+        )
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(self.port)],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env,
+        )
+        self.healthy = False
+        self.sessions.clear()
+
+    def stop(self, timeout=10):
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+    def status(self):
+        return {
+            "name": self.name,
+            "port": self.port,
+            "healthy": self.healthy,
+            "draining": self.draining,
+            "sessions": len(self.sessions),
+            "restarts": self.restarts,
+        }
+
+
+workers = {
+    f"worker-{i}": Worker(f"worker-{i}", WORKER_BASE_PORT + i)
+    for i in range(ROUTER_WORKERS)
+}
+ring = HashRing(list(workers))
+_round_robin = itertools.cycle(list(workers))
+
+app = FastAPI(title="Syera AI Interview Router")
+http = None
+scheduler = LLMScheduler()
+client_usage = ledger.ClientUsage()
+_admission_pool = ThreadPoolExecutor(max_workers=ADMISSION_THREADS, thread_name_prefix="admission")
+
+
+def owner(session_id):
+    return workers[ring.node_for(session_id)]
+
+
+def any_worker():
+    """A healthy worker for requests that don't belong to a session."""
+    for _ in range(len(workers)):
+        worker = workers[next(_round_robin)]
+        if worker.healthy:
+            return worker
+    return None
+
+
+def place_session():
+    """
+    Mint a session id whose ring owner is accepting new interviews.
+    Ids that land on a down or draining worker are simply re-minted, so the
+    ring itself never changes and existing sessions never move.
+    """
+    if not any(w.accepting for w in workers.values()):
+        return None, None
+    while True:
+        session_id = new_session_id()
+        worker = owner(session_id)
+        if worker.accepting:
+            return session_id, worker
+
+
+def unavailable(message="No worker available, retry shortly"):
+    return JSONResponse(status_code=503, content={"error": message}, headers={"Retry-After": "2"})
+
+
+# --------------------------------------------------
+# SUPERVISION (restarts, health, draining)
+# --------------------------------------------------
+async def check_worker(worker):
+    now = time.time()
+
+    if worker.process is None or worker.process.poll() is not None:
+        # Crashed: its sessions are gone, but it keeps its place on the ring
+        if worker.process is not None:
+            logger.warning("worker exited, restarting", extra={"worker": worker.name, "code": worker.process.returncode})
+            worker.restarts += 1
+        worker.spawn()
+        return
+
+    if worker.draining:
+        expired = now - worker.drain_started > DRAIN_TIMEOUT
+        if not worker.sessions or expired:
+            logger.info("worker drained, restarting", extra={"worker": worker.name, "abandoned": len(worker.sessions)})
+            await asyncio.to_thread(worker.stop)
+            worker.restarts += 1
+            worker.draining = False
+            worker.spawn()
+            return
+
+    try:
+        response = await http.get(f"{worker.url}/health", timeout=1.0)
+        worker.healthy = response.status_code == 200
+    except httpx.HTTPError:
+        worker.healthy = False
+
+    for session_id, started in list(worker.sessions.items()):
+        if now - started > SESSION_MAX_AGE:
+            worker.sessions.pop(session_id, None)
+
+
+async def supervise():
+    while True:
+        for worker in workers.values():
+            try:
+                await check_worker(worker)
+            except Exception as e:
+                logger.error("worker supervision error", extra={"worker": worker.name, "error": str(e)})
+        await asyncio.sleep(HEALTH_INTERVAL)
+
+
+@app.on_event("startup")
+async def start_workers():
+    global http
+    http = httpx.AsyncClient(timeout=httpx.Timeout(None, connect=5.0))
+    for worker in workers.values():
+        worker.spawn()
+    asyncio.create_task(supervise())
+
+
+@app.on_event("shutdown")
+async def stop_workers():
+    for worker in workers.values():
+        await asyncio.to_thread(worker.stop)
+    await http.aclose()
+
+
+# -------- ROUTER ADMIN --------
+@app.get("/router/status")
+def router_status():
+    return {"workers": [w.status() for w in workers.values()]}
+
+
+# Rolling restart: stop placing new interviews on the worker, wait for its
+# sessions to end (or ROUTER_DRAIN_TIMEOUT), then restart it.
+@app.post("/router/workers/{name}/drain")
+def drain_worker(name: str):
+    worker = workers.get(name)
+    if worker is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown worker"})
+    if not worker.draining:
+        worker.draining = True
+        worker.drain_started = time.time()
+        logger.info("worker draining", extra={"worker": name, "sessions": len(worker.sessions)})
+    return worker.status()
+
+
+# --------------------------------------------------
+# LLM ADMISSION (shared by all workers, see llm_scheduler.RemoteScheduler)
+# --------------------------------------------------
+def from_worker(request):
+    secret = request.headers.get("x-router-secret") or ""
+    return hmac.compare_digest(secret, ROUTER_SECRET)
+
+
+def forbidden():
+    return JSONResponse(status_code=403, content={"error": "Workers only"})
+
+
+@app.post("/router/llm/acquire")
+async def llm_acquire(request: Request):
+    if not from_worker(request):
+        return forbidden()
+    data = await request.json()
+    loop = asyncio.get_running_loop()
+    try:
+        waited = await loop.run_in_executor(
+            _admission_pool, scheduler.acquire, int(data["priority"]), int(data["estimate"]), float(data["timeout"])
+        )
+    except LLMQueueTimeout:
+        return {"admitted": False}
+    return {"admitted": True, "waited": waited}
+
+
+@app.post("/router/llm/reconcile")
+async def llm_reconcile(request: Request):
+    if not from_worker(request):
+        return forbidden()
+    data = await request.json()
+    scheduler.reconcile(int(data["estimate"]), int(data["actual"]))
+    return {"ok": True}
+
+
+@app.post("/router/llm/throttled")
+def llm_throttled(request: Request):
+    if not from_worker(request):
+        return forbidden()
+    scheduler.throttled()
+    return {"ok": True}
+
+
+@app.get("/router/llm/stats")
+def llm_stats():
+    return scheduler.queue_stats()
+
+
+# -------- CLIENT USAGE (see ledger.RemoteClientUsage) --------
+@app.post("/router/clients/open")
+async def clients_open(request: Request):
+    if not from_worker(request):
+        return forbidden()
+    data = await request.json()
+    return {"allowed": client_usage.open(str(data["client_id"]))}
+
+
+@app.post("/router/clients/charge")
+async def clients_charge(request: Request):
+    if not from_worker(request):
+        return forbidden()
+    data = await request.json()
+    return client_usage.charge(str(data["client_id"]), int(data.get("tokens", 0)), int(data.get("tts_chars", 0)))
+
+
+@app.get("/health")
+def health_check():
+    healthy = sum(1 for w in workers.values() if w.healthy)
+    return {
+        "status": "ok" if healthy else "unavailable",
+        "service": "Syera AI Interview Router",
+        "healthy_workers": healthy,
+        "workers": len(workers),
+    }
+
+
+# --------------------------------------------------
+# HTTP PROXY
+# --------------------------------------------------
+def forward_headers(request, extra=None):
+    headers = {
+        k: v for k, v in request.headers.items()
+        if k.lower() not in HOP_BY_HOP and k.lower() not in ("x-client-id", "x-router-secret")
+    }
+    # Workers see the router as the caller; keep per-client budgets per real
+    # client. Whatever X-Client-Id the client sent is replaced, never trusted
+    headers["x-client-id"] = ledger.client_address(request.headers, request.client.host if request.client else None)
+    headers["x-router-secret"] = ROUTER_SECRET
+    headers.update(extra or {})
+    return headers
+
+
+async def proxy(request, worker, body, extra_headers=None):
+    upstream = http.build_request(
+        request.method,
+        f"{worker.url}{request.url.path}",
+        params=request.query_params,
+        headers=forward_headers(request, extra_headers),
+        content=body,
+    )
+    try:
+        response = await http.send(upstream, stream=True)
+    except httpx.HTTPError as e:
+        logger.warning("worker request failed", extra={"worker": worker.name, "path": request.url.path, "error": str(e)})
+        worker.healthy = False
+        return None
+
+    headers = {k: v for k, v in response.headers.items() if k.lower() not in HOP_BY_HOP}
+    # Streamed bodies (NDJSON turns, /end/stream, audio) are relayed chunk by chunk
+    return StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        headers=headers,
+        background=BackgroundTask(response.aclose),
+    )
+
+
+def body_session_id(body):
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        return None
+    return data.get("session_id") if isinstance(data, dict) else None
+
+
+@app.post("/start")
+async def start_interview(request: Request):
+    session_id, worker = place_session()
+    if worker is None:
+        return unavailable()
+
+    response = await proxy(request, worker, await request.body(), {"x-session-id": session_id})
+    if response is None:
+        return unavailable()
+    if response.status_code == 200:
+        worker.sessions[session_id] = time.time()
+    return response
+
+
+@app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
+async def route(path: str, request: Request):
+    body = await request.body()
+    session_id = body_session_id(body) if request.method == "POST" else None
+
+    if session_id:
+        worker = owner(session_id)
+        if not worker.healthy:
+            return unavailable("Worker for this session is restarting, retry shortly")
+    else:
+        worker = any_worker()
+        if worker is None:
+            return unavailable()
+
+    response = await proxy(request, worker, body)
+    if response is None:
+        return unavailable()
+    if session_id and path in ("end", "end/stream") and response.status_code == 200:
+        worker.sessions.pop(session_id, None)
+    return response
+
+
+# --------------------------------------------------
+# WEBSOCKET PROXY (/answer/stream)
+# --------------------------------------------------
+@app.websocket("/answer/stream")
+async def answer_stream(websocket: WebSocket):
+    await websocket.accept()
+
+    # Session id from the query string, or from the first text frame
+    session_id = websocket.query_params.get("session_id")
+    first_frame = None
+    if not session_id:
+        first_frame = await websocket.receive_text()
+        session_id = body_session_id(first_frame.encode("utf-8"))
+    if not session_id:
+        await websocket.close(code=1008, reason="valid session_id required")
+        return
+
+    worker = owner(session_id)
+    if not worker.healthy:
+        await websocket.close(code=1013, reason="worker restarting, retry shortly")
+        return
+
+    url = f"ws://127.0.0.1:{worker.port}/answer/stream?{websocket.url.query}"
+    try:
+        async with websockets.connect(url, max_size=None) as upstream:
+            if first_frame is not None:
+                await upstream.send(first_frame)
+
+            async def client_to_worker():
+                while True:
+                    message = await websocket.receive()
+                    if message["type"] == "websocket.disconnect":
+                        await upstream.close()
+                        return
+                    if message.get("bytes") is not None:
+                        await upstream.send(message["bytes"])
+                    elif message.get("text") is not None:
+                        await upstream.send(message["text"])
+
+            async def worker_to_client():
+                async for message in upstream:
+                    if isinstance(message, bytes):
+                        await websocket.send_bytes(message)
+                    else:
+                        await websocket.send_text(message)
+                await websocket.close(code=upstream.close_code or 1000, reason=upstream.close_reason or "")
+
+            tasks = [asyncio.create_task(client_to_worker()), asyncio.create_task(worker_to_client())]
+            _, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+    except (OSError, websockets.WebSocketException, WebSocketDisconnect) as e:
+        logger.warning("websocket proxy error", extra={"worker": worker.name, "session_id": session_id, "error": str(e)})
+        try:
+            await websocket.close(code=1011)
+        except RuntimeError:
+            pass
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    port = int(os.environ.get("PORT", 8000))
+
+    uvicorn.run(app, host="0.0.0.0", port=port)
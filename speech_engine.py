@@ -0,0 +1,185 @@
+import io
+import os
+import wave
+from array import array
+
+from config import GROQ_API_KEY, STT_BACKEND, VAD_SILENCE_MS
+
+# Audio format expected from clients: 16-bit little-endian mono PCM
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+FRAME_MS = 30
+FRAME_BYTES = SAMPLE_RATE * SAMPLE_WIDTH * FRAME_MS // 1000
+
+
+# --------------------------------------------------
+# VOICE ACTIVITY DETECTION (end-of-answer endpointing)
+# --------------------------------------------------
+class VoiceActivityDetector:
+    """
+    Energy-based endpointer over 30ms PCM frames.
+
+    Tracks an adaptive noise floor, marks a frame as speech when its RMS is
+    well above that floor, and reports end-of-answer once the candidate has
+    spoken for at least `min_speech_ms` and then stayed silent for
+    `silence_ms`. The floor starts fixed (so a stream that opens
+    mid-sentence isn't taken as background noise) and follows non-speech
+    frames. After `drift_after_ms` of unbroken "speech" it also drifts up by
+    `floor_drift` per frame, so steady background noise louder than
+    `min_rms` stops counting as speech within a second or two instead of
+    holding the answer open until `max_answer_ms`.
+    """
+
+    def __init__(self, silence_ms=VAD_SILENCE_MS, min_speech_ms=300, max_answer_ms=120000,
+                 threshold_ratio=3.0, min_rms=300, floor_drift=0.02, drift_after_ms=500):
+        self.silence_frames = max(1, silence_ms // FRAME_MS)
+        self.min_speech_frames = max(1, min_speech_ms // FRAME_MS)
+        self.max_frames = max_answer_ms // FRAME_MS
+        self.threshold_ratio = threshold_ratio
+        self.min_rms = min_rms
+        self.floor_drift = floor_drift
+        self.drift_after_frames = max(1, drift_after_ms // FRAME_MS)
+        # Starting floor: speech threshold is exactly min_rms until it adapts
+        self.initial_floor = min_rms / threshold_ratio
+        self.reset()
+
+    def reset(self):
+        self.noise_floor = self.initial_floor
+        self.speech_run = 0
+        self.speech_frames = 0
+        self.trailing_silence = 0
+        self.total_frames = 0
+        self.audio = bytearray()
+        self._pending = b""
+
+    @staticmethod
+    def frame_rms(frame):
+        samples = array("h", frame)
+        if not samples:
+            return 0.0
+        return (sum(s * s for s in samples) / len(samples)) ** 0.5
+
+    def is_speech(self, frame):
+        rms = self.frame_rms(frame)
+
+        threshold = max(self.min_rms, self.noise_floor * self.threshold_ratio)
+        speech = rms >= threshold
+
+        if not speech:
+            self.speech_run = 0
+            # Falls quickly, rises slowly: frames at the edges of words are
+            # louder than the room and shouldn't drag the floor up
+            alpha = 0.05 if rms < self.noise_floor else 0.01
+            self.noise_floor += alpha * (rms - self.noise_floor)
+        else:
+            # Speech has pauses between words; "speech" with no dip for
+            # drift_after_ms is likely steady noise, so the floor creeps up
+            # (never past the frame itself) until the noise falls below it
+            self.speech_run += 1
+            if self.speech_run > self.drift_after_frames:
+                self.noise_floor = min(rms, self.noise_floor * (1 + self.floor_drift))
+
+        return speech
+
+    def feed(self, chunk):
+        """
+        Add raw PCM bytes. Returns True once the end of the answer is detected.
+        """
+        data = self._pending + chunk
+        usable = len(data) - (len(data) % FRAME_BYTES)
+        self._pending = data[usable:]
+
+        for offset in range(0, usable, FRAME_BYTES):
+            frame = data[offset:offset + FRAME_BYTES]
+            self.audio.extend(frame)
+            self.total_frames += 1
+
+            if self.is_speech(frame):
+                self.speech_frames += 1
+                self.trailing_silence = 0
+            elif self.speech_frames:
+                self.trailing_silence += 1
+
+            if self.speech_frames >= self.min_speech_frames and self.trailing_silence >= self.silence_frames:
+                return True
+            if self.total_frames >= self.max_frames:
+                return True
+
+        return False
+
+    def has_speech(self):
+        return self.speech_frames >= self.min_speech_frames
+
+    def take_audio(self):
+        """Return the buffered answer audio and reset for the next turn."""
+        audio = bytes(self.audio)
+        self.reset()
+        return audio
+
+
+def pcm_to_wav(pcm):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(SAMPLE_WIDTH)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+# --------------------------------------------------
+# SPEECH-TO-TEXT BACKENDS
+# --------------------------------------------------
+_groq_client = None
+_local_model = None
+
+
+def transcribe_groq(pcm):
+    """Whisper on Groq - same provider we already use for the interviewer."""
+    global _groq_client
+    if _groq_client is None:
+        from groq import Groq
+        _groq_client = Groq(api_key=GROQ_API_KEY)
+
+    result = _groq_client.audio.transcriptions.create(
+        file=("answer.wav", pcm_to_wav(pcm)),
+        model=os.getenv("STT_GROQ_MODEL", "whisper-large-v3-turbo"),
+        language="en",
+    )
+    return result.text.strip()
+
+
+def transcribe_local(pcm):
+    """On-box Whisper via faster-whisper (optional dependency)."""
+    global _local_model
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError:
+        raise RuntimeError("STT backend 'local' requires the faster-whisper package")
+
+    if _local_model is None:
+        _local_model = WhisperModel(os.getenv("STT_LOCAL_MODEL", "base.en"), compute_type="int8")
+
+    segments, _ = _local_model.transcribe(io.BytesIO(pcm_to_wav(pcm)), language="en")
+    return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+def transcribe_stub(pcm):
+    """Offline stand-in for tests and soak runs - no model, fixed transcript."""
+    if not pcm:
+        return ""
+    return os.getenv("STT_STUB_TEXT", "I have worked on a few backend projects using Python.")
+
+
+STT_BACKENDS = {
+    "groq": transcribe_groq,
+    "local": transcribe_local,
+    "stub": transcribe_stub,
+}
+
+
+def transcribe(pcm, backend=None):
+    name = backend or STT_BACKEND
+    if name not in STT_BACKENDS:
+        raise ValueError(f"Unknown STT backend: {name}")
+    return STT_BACKENDS[name](pcm)
@@ -1,99 +1,128 @@
-import time
+import asyncio
 
 from interview_engine import (
-    generate_question,
-    store_answer,
-    get_full_conversation,
-    generate_closing,
-    answer_candidate_question
+    start_session,
+    process_answer,
+    finish_interview,
 )
 
-from analysis_engine import analyze_interview
-from voice import speak, listen
+from voice import synthesize, play, listen
+from voice_engine import split_sentences
 from state_manager import set_state, InterviewState
 
+# ---------- SPEAKER PIPELINE ----------
+class Speaker:
+    """
+    Plays interviewer turns sentence by sentence. Every sentence is sent to
+    TTS as soon as it is queued, so sentence N+1 is being synthesized while
+    sentence N is still playing. Prefetched audio is reused by text.
+    """
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.cache = {}
+        self.player = asyncio.create_task(self._play_loop())
+
+    def _synthesis(self, text):
+        if text not in self.cache:
+            self.cache[text] = asyncio.ensure_future(asyncio.to_thread(synthesize, text))
+        return self.cache[text]
+
+    def prefetch(self, text):
+        for sentence in split_sentences(text):
+            self._synthesis(sentence)
+
+    def say(self, text):
+        print("\nAI:", text)
+        for sentence in split_sentences(text):
+            self.queue.put_nowait(self._synthesis(sentence))
+
+    async def _play_loop(self):
+        while True:
+            pending = await self.queue.get()
+            try:
+                audio = await pending
+                set_state(InterviewState.SPEAKING)
+                await asyncio.to_thread(play, audio)
+            except Exception as e:
+                print("PLAYBACK ERROR:", e)
+            finally:
+                self.queue.task_done()
+
+    async def drain(self):
+        await self.queue.join()
+
+    def close(self):
+        self.player.cancel()
+
+
+# ---------- INTERVIEW RUNNER ----------
+async def run_interview(name, topic, duration):
+    """
+    Runs one interview through the same engine functions as the web API
+    (start_session / process_answer / finish_interview), so stage changes and
+    closing times match the /start, /answer and /end flow exactly.
+    """
+    speaker = Speaker()
+    turn = start_session(name, topic, duration, client_id="cli")
+    session_id = turn["session_id"]
+    analysis_task = None
+
+    try:
+        while True:
+            speaker.say(turn["question"])
+
+            if turn.get("action") == "end_interview":
+                # Analyse while the goodbye is still playing
+                analysis_task = asyncio.create_task(asyncio.to_thread(finish_interview, session_id))
+                await speaker.drain()
+                break
+
+            await speaker.drain()
+
+            # Candidate answering
+            set_state(InterviewState.LISTENING)
+            answer = await asyncio.to_thread(listen)
+            print("Candidate:", answer)
+
+            # AI thinking
+            set_state(InterviewState.THINKING)
+            turn = await asyncio.to_thread(process_answer, session_id, answer)
+
+            # The engine flags the last question - synthesize the closing meanwhile
+            for text in turn.get("prefetch", []):
+                speaker.prefetch(text)
+
+        set_state(InterviewState.IDLE)
+        print("\nAnalyzing interview...\n")
+        return await analysis_task
+
+    finally:
+        speaker.close()
+
+
+def main():
+    print("\n====== AI MOCK INTERVIEW SYSTEM ======\n")
+
+    # ---------- USER INPUT ----------
+    name = input("Enter your name: ")
+    topic = input("Enter interview role/topic: ")
+
+    print("\nSelect Interview Duration:")
+    print("1. 3 Minutes")
+    print("2. 5 Minutes")
+    print("3. 10 Minutes")
+
+    choice = input("Enter choice (1/2/3): ")
+    duration = {"1": "3", "2": "5"}.get(choice, "10")
 
-print("\n====== AI MOCK INTERVIEW SYSTEM ======\n")
+    print("\nInterview Started...\n")
 
-# ---------- USER INPUT ----------
-name = input("Enter your name: ")
-topic = input("Enter interview role/topic: ")
+    result = asyncio.run(run_interview(name, topic, duration))
 
-print("\nSelect Interview Duration:")
-print("1. 3 Minutes")
-print("2. 5 Minutes")
-print("3. 10 Minutes")
+    print("\n===== INTERVIEW ANALYSIS =====\n")
+    print(result["analysis"])
 
-choice = input("Enter choice (1/2/3): ")
 
-if choice == "1":
-    INTERVIEW_TIME = 3 * 60
-elif choice == "2":
-    INTERVIEW_TIME = 5 * 60
-else:
-    INTERVIEW_TIME = 10 * 60
-
-
-print("\nInterview Started...\n")
-
-start_time = time.time()
-question_count = 0
-MAX_QUESTIONS = 5
-
-
-# ---------- INTERVIEW LOOP ----------
-while (time.time() - start_time < INTERVIEW_TIME) and (question_count < MAX_QUESTIONS):
-
-    # AI thinking
-    set_state(InterviewState.THINKING)
-    time.sleep(1)
-
-    # Generate question
-    question = generate_question(topic, name)
-
-    # AI speaking
-    set_state(InterviewState.SPEAKING)
-    print("\nAI:", question)
-    speak(question)
-
-    # Candidate answering
-    set_state(InterviewState.LISTENING)
-    answer = listen()
-
-    print("Candidate:", answer)
-
-    store_answer(answer)
-
-    question_count += 1
-
-
-# ---------- INTERVIEW ENDING ----------
-set_state(InterviewState.IDLE)
-
-closing_question = generate_closing(name)
-
-print("\nAI:", closing_question)
-speak(closing_question)
-
-# Candidate asks interviewer a question
-set_state(InterviewState.LISTENING)
-candidate_question = listen()
-
-print("Candidate:", candidate_question)
-
-# AI replies professionally
-set_state(InterviewState.THINKING)
-ai_reply = answer_candidate_question(candidate_question)
-
-set_state(InterviewState.SPEAKING)
-print("\nAI:", ai_reply)
-speak(ai_reply)
-
-
-# ---------- ANALYSIS ----------
-print("\nAnalyzing interview...\n")
-
-analysis = analyze_interview(get_full_conversation())
-
-print("\n===== INTERVIEW ANALYSIS =====\n")
-print(analysis)
+if __name__ == "__main__":
+    main()
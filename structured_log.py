@@ -0,0 +1,144 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Fraction of records kept per level (1.0 keeps all; set LOG_DEBUG_SAMPLE to sample DEBUG)
+LOG_SAMPLE_RATES = {
+    logging.DEBUG: float(os.getenv("LOG_DEBUG_SAMPLE", "1.0")),
+}
+# Max DEBUG records per second across the process (token bucket)
+LOG_DEBUG_RATE = float(os.getenv("LOG_DEBUG_RATE", "50"))
+
+# Attributes every LogRecord has - anything else came from `extra=`
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_counters = {"dropped": 0, "sampled_out": 0, "rate_limited": 0}
+_counter_lock = threading.Lock()
+_setup_lock = threading.Lock()
+_listener = None
+_queue = None
+
+
+def _count(name):
+    with _counter_lock:
+        _counters[name] += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg + any `extra` fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Per-level sampling plus a token-bucket rate limit for DEBUG records."""
+
+    def __init__(self, sample_rates, debug_rate):
+        super().__init__()
+        self.sample_rates = sample_rates
+        self.debug_rate = debug_rate
+        self.tokens = debug_rate
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        rate = self.sample_rates.get(record.levelno, 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            _count("sampled_out")
+            return False
+
+        if record.levelno <= logging.DEBUG and self.debug_rate > 0:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.debug_rate, self.tokens + (now - self.last_refill) * self.debug_rate)
+                self.last_refill = now
+                if self.tokens < 1:
+                    _count("rate_limited")
+                    return False
+                self.tokens -= 1
+
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the background writer without ever blocking.
+    When the queue is full (sink stalled) the record is dropped and counted.
+    """
+
+    def prepare(self, record):
+        # Cheap copy: resolve the message now, leave JSON encoding to the writer
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _count("dropped")
+
+
+def setup_logging(stream=None, level=None, queue_size=None):
+    """
+    Route all "syera.*" loggers through a bounded queue to a background
+    thread that writes JSON lines to `stream` (stdout by default).
+    Safe to call more than once; later calls replace the sink.
+    """
+    global _listener, _queue
+
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+
+        _queue = queue.Queue(maxsize=queue_size or LOG_QUEUE_SIZE)
+
+        sink = logging.StreamHandler(stream or sys.stdout)
+        sink.setFormatter(JsonFormatter())
+
+        handler = DroppingQueueHandler(_queue)
+        handler.addFilter(SamplingFilter(LOG_SAMPLE_RATES, LOG_DEBUG_RATE))
+
+        root = logging.getLogger("syera")
+        root.handlers = [handler]
+        root.setLevel(level or LOG_LEVEL)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(_queue, sink)
+        _listener.start()
+
+
+def get_logger(name):
+    if _listener is None:
+        setup_logging()
+    return logging.getLogger(f"syera.{name}")
+
+
+def log_stats():
+    with _counter_lock:
+        stats = dict(_counters)
+    stats["queue_depth"] = _queue.qsize() if _queue is not None else 0
+    return stats
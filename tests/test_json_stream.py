@@ -0,0 +1,89 @@
+import json
+
+from json_stream import ObjectFieldStream, parse_partial_object, repair_member
+
+
+ANALYSIS = {
+    "technical_score": 72,
+    "communication_score": 65,
+    "strengths": ["clear examples", "owns mistakes"],
+    "details": {"depth": "good", "notes": ["a", "b"]},
+    "summary": "Solid backend candidate, says \"it depends\" {a lot}.",
+}
+
+
+def test_complete_object():
+    assert parse_partial_object(json.dumps(ANALYSIS)) == ANALYSIS
+
+
+def test_leading_and_trailing_text():
+    text = "Here is the JSON:\n" + json.dumps(ANALYSIS) + "\nHope this helps! {}"
+    assert parse_partial_object(text) == ANALYSIS
+
+
+def test_braced_prose_before_object():
+    text = 'Here {x} is: {"technical_score": 50, "summary": "ok"}'
+    assert parse_partial_object(text) == {"technical_score": 50, "summary": "ok"}
+
+
+def test_several_braced_spans_before_object():
+    text = "Scores {below} and [notes] {see: rubric} -> " + json.dumps(ANALYSIS)
+    assert parse_partial_object(text) == ANALYSIS
+
+
+def test_stray_braces_after_object_are_ignored():
+    text = '{"technical_score": 50} and then {"technical_score": 90}'
+    assert parse_partial_object(text) == {"technical_score": 50}
+
+
+def test_truncated_recovers_complete_members_and_containers():
+    text = json.dumps(ANALYSIS)
+    cut = text[: text.index('"owns mistakes"') + 5]
+    assert parse_partial_object(cut) == {
+        "technical_score": 72,
+        "communication_score": 65,
+        "strengths": ["clear examples"],
+    }
+
+
+def test_truncated_scalar_is_not_recovered():
+    assert parse_partial_object('{"technical_score": 72, "communication_score": 6') == {"technical_score": 72}
+
+
+def test_empty_and_garbage():
+    assert parse_partial_object("") == {}
+    assert parse_partial_object(None) == {}
+    assert parse_partial_object("no json here") == {}
+
+
+def test_feed_yields_members_as_they_complete():
+    text = json.dumps(ANALYSIS)
+    parser = ObjectFieldStream()
+    seen = []
+    for i in range(0, len(text), 7):
+        seen.extend(parser.feed(text[i:i + 7]))
+    assert seen == list(ANALYSIS.items())
+    assert parser.finish() == []
+    assert parser.fields == ANALYSIS
+
+
+def test_feed_splits_braced_prose_across_chunks():
+    parser = ObjectFieldStream()
+    seen = []
+    for chunk in ["Here {", "x} is: {", '"a": 1, ', '"b": [2]', "}"]:
+        seen.extend(parser.feed(chunk))
+    assert seen == [("a", 1), ("b", [2])]
+
+
+def test_feed_ignores_input_after_close():
+    parser = ObjectFieldStream()
+    parser.feed('{"a": 1}')
+    assert parser.feed('{"b": 2}') == []
+    assert parser.fields == {"a": 1}
+
+
+def test_repair_member():
+    assert repair_member('"a": [1, 2') == '"a": [1]'
+    assert repair_member('"a": {"b": [1], "c": "x') == '"a": {"b": [1]}'
+    assert repair_member('"a": 1') == '"a": 1'
+    assert repair_member('"a') == ""
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from quantile_sketch import TDigest
+
+
+def filled(values, compression=100):
+    digest = TDigest(compression)
+    for value in values:
+        digest.add(value)
+    return digest
+
+
+def test_empty():
+    digest = TDigest()
+    assert digest.cdf(50) is None
+    assert digest.quantile(0.5) is None
+
+
+def test_single_value():
+    digest = filled([42])
+    assert digest.cdf(41) == 0.0
+    assert digest.cdf(42) == pytest.approx(0.5)
+    assert digest.cdf(43) == 1.0
+    assert digest.quantile(0.5) == 42
+
+
+def test_uniform_scores_are_accurate():
+    rng = random.Random(7)
+    values = [rng.uniform(0, 100) for _ in range(20_000)]
+    digest = filled(values)
+    ordered = sorted(values)
+    for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+        assert digest.quantile(q) == pytest.approx(ordered[int(q * len(ordered))], abs=1.0)
+        assert digest.cdf(ordered[int(q * len(ordered))]) == pytest.approx(q, abs=0.01)
+
+
+def test_centroids_stay_bounded():
+    digest = filled(range(50_000), compression=100)
+    assert len(digest.to_dict()["centroids"]) <= 200
+
+
+def test_cdf_is_monotonic_and_within_bounds():
+    rng = random.Random(3)
+    digest = filled([rng.gauss(60, 15) for _ in range(5_000)])
+    ranks = [digest.cdf(x) for x in range(-20, 140)]
+    assert ranks == sorted(ranks)
+    assert ranks[0] == 0.0 and ranks[-1] == 1.0
+
+
+def test_top_score_ranks_below_one():
+    digest = filled(list(range(100)) + [100])
+    assert 0.99 < digest.cdf(100) < 1.0
+
+
+def test_repeated_values_rank_at_midpoint():
+    digest = filled([50] * 100 + [70] * 100)
+    # A centroid can straddle the two values, so allow a little slack
+    assert digest.cdf(50) == pytest.approx(0.25, abs=0.02)
+    assert digest.cdf(70) == pytest.approx(0.75, abs=0.02)
+
+
+def test_round_trip_keeps_answers():
+    rng = random.Random(11)
+    digest = filled([rng.uniform(0, 100) for _ in range(3_000)])
+    copy = TDigest.from_dict(digest.to_dict())
+    for q in (0.1, 0.5, 0.9):
+        assert copy.quantile(q) == digest.quantile(q)
+    assert copy.cdf(33) == digest.cdf(33)
+
+    copy.add(200)
+    assert copy.max == 200 and copy.cdf(200) > 0.99
@@ -0,0 +1,113 @@
+import os
+import threading
+
+# --------------------------------------------------
+# ROLLING LATENCY ESTIMATES
+# --------------------------------------------------
+# Seconds, used until real measurements arrive:
+#   question - LLM time to generate the next question (inside /answer)
+#   closing  - LLM time to answer the candidate's final question
+#   tts      - time to synthesize one interviewer turn
+#   answer   - from a turn being served to the next answer arriving
+#              (client TTS + playback + the candidate answering)
+DEFAULT_ESTIMATES = {
+    "question": float(os.getenv("EST_QUESTION_SECONDS", "1.5")),
+    "closing": float(os.getenv("EST_CLOSING_SECONDS", "1.5")),
+    "tts": float(os.getenv("EST_TTS_SECONDS", "1.0")),
+    "answer": float(os.getenv("EST_ANSWER_SECONDS", "30")),
+}
+
+# Weight of the newest sample in the moving averages
+SESSION_ALPHA = 0.3
+GLOBAL_ALPHA = 0.1
+# Per-session averages are trusted after this many samples
+MIN_SESSION_SAMPLES = 2
+
+# Interviewer speech rate, for how long a turn takes to play
+WORDS_PER_SECOND = 2.5
+# Time allowed for the candidate's reply to the closing ("any questions?")
+CLOSING_REPLY_SECONDS = float(os.getenv("CLOSING_REPLY_SECONDS", "15"))
+
+_global = dict(DEFAULT_ESTIMATES)
+_sessions = {}  # session_id -> {kind: [average, samples]}
+_lock = threading.Lock()
+
+
+def record(kind, seconds, session_id=None):
+    """Fold one measured duration into the global and per-session averages."""
+    if seconds is None or seconds < 0:
+        return
+    with _lock:
+        _global[kind] += GLOBAL_ALPHA * (seconds - _global[kind])
+        # Unknown or already closed sessions (e.g. a stale id sent to /voice)
+        # only feed the global average
+        session = _sessions.get(session_id)
+        if session is None:
+            return
+        stats = session.get(kind)
+        if stats is None:
+            session[kind] = [seconds, 1]
+        else:
+            stats[0] += SESSION_ALPHA * (seconds - stats[0])
+            stats[1] += 1
+
+
+def estimate(kind, session_id=None):
+    """Per-session average once it has enough samples, else the global one."""
+    with _lock:
+        stats = _sessions.get(session_id, {}).get(kind)
+        if stats is not None and stats[1] >= MIN_SESSION_SAMPLES:
+            return stats[0]
+        return _global[kind]
+
+
+def open_session(session_id):
+    """Start per-session averages; record() ignores ids that were never opened."""
+    with _lock:
+        _sessions.setdefault(session_id, {})
+
+
+def close_session(session_id):
+    with _lock:
+        _sessions.pop(session_id, None)
+
+
+def speech_seconds(text):
+    return len(text.split()) / WORDS_PER_SECOND
+
+
+# --------------------------------------------------
+# DECISIONS
+# --------------------------------------------------
+def closing_seconds(session_id, closing_text, goodbye_text):
+    """
+    Time the closing needs: the closing turn played, the candidate's reply,
+    the answer to their question and the goodbye played in full.
+    """
+    tts = estimate("tts", session_id)
+    return (
+        tts + speech_seconds(closing_text)
+        + CLOSING_REPLY_SECONDS
+        + estimate("closing", session_id)
+        + tts + speech_seconds(goodbye_text)
+    )
+
+
+def question_seconds(session_id):
+    """Time one more question/answer cycle takes."""
+    return estimate("question", session_id) + estimate("answer", session_id)
+
+
+def plan(session_id, remaining, closing_text, goodbye_text):
+    """
+    Decide the next step with `remaining` seconds left in the interview.
+    Returns (ask_another, last_question):
+      ask_another   - one more question still leaves time for the closing
+      last_question - after this question only the closing fits, so it
+                      should be prepared now
+    """
+    closing = closing_seconds(session_id, closing_text, goodbye_text)
+    cycle = question_seconds(session_id)
+    ask_another = remaining >= cycle + closing
+    last_question = ask_another and remaining < 2 * cycle + closing
+    return ask_another, last_question
@@ -0,0 +1,80 @@
+import os
+import shutil
+import subprocess
+
+from voice_engine import speak as synthesize
+from speech_engine import SAMPLE_RATE, FRAME_BYTES, VoiceActivityDetector, transcribe
+
+# keyboard = type answers, mic = record from default input device
+LISTEN_BACKEND = os.getenv("CLI_LISTEN_BACKEND", "keyboard")
+
+PLAYERS = [
+    ["mpg123", "-q", "-"],
+    ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", "-"],
+]
+
+RECORDERS = [
+    ["arecord", "-q", "-f", "S16_LE", "-r", str(SAMPLE_RATE), "-c", "1", "-t", "raw"],
+    ["rec", "-q", "-t", "raw", "-r", str(SAMPLE_RATE), "-e", "signed", "-b", "16", "-c", "1", "-"],
+]
+
+
+def _find_command(candidates):
+    for command in candidates:
+        if shutil.which(command[0]):
+            return command
+    return None
+
+
+# --------------------------------------------------
+# PLAYBACK
+# --------------------------------------------------
+def play(audio):
+    """Play MP3 bytes through the first available command-line player."""
+    if not audio:
+        return
+    command = _find_command(PLAYERS)
+    if command is None:
+        print("VOICE: no audio player found (install mpg123 or ffmpeg)")
+        return
+    subprocess.run(command, input=audio, check=False)
+
+
+def speak(text):
+    play(synthesize(text))
+
+
+# --------------------------------------------------
+# LISTENING
+# --------------------------------------------------
+def listen_keyboard():
+    return input("Your answer: ").strip()
+
+
+def listen_mic():
+    command = _find_command(RECORDERS)
+    if command is None:
+        raise RuntimeError("Microphone capture needs arecord (alsa-utils) or rec (sox)")
+
+    detector = VoiceActivityDetector()
+    recorder = subprocess.Popen(command, stdout=subprocess.PIPE)
+    try:
+        while True:
+            chunk = recorder.stdout.read(FRAME_BYTES)
+            if not chunk or detector.feed(chunk):
+                break
+    finally:
+        recorder.terminate()
+        recorder.wait()
+
+    return transcribe(detector.take_audio())
+
+
+LISTEN_BACKENDS = {
+    "keyboard": listen_keyboard,
+    "mic": listen_mic,
+}
+
+
+def listen():
+    return LISTEN_BACKENDS[LISTEN_BACKEND]()
@@ -1,13 +1,26 @@
 import requests
 import io
 import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from structured_log import get_logger
 
 load_dotenv()
 
 SARVAM_API_KEY = os.getenv("SARVAM_API_KEY")
 
 API_URL = "https://api.sarvam.ai/text-to-speech/stream"
+logger = get_logger("voice")
+
+# Sentence-level synthesis settings
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "8"))          # shared across requests
+TTS_FANOUT = int(os.getenv("TTS_FANOUT", "3"))            # in-flight sentences per request
+SENTENCE_CACHE_SIZE = int(os.getenv("TTS_SENTENCE_CACHE", "512"))
+MIN_SENTENCE_CHARS = 25  # shorter sentences are merged with the next one
 
 def speak(text: str):
     headers = {
@@ -47,6 +60,147 @@ def speak(text: str):
         return audio_buffer.read()
 
     except (requests.exceptions.RequestException, requests.exceptions.Timeout) as e:
-        print("Sarvam TTS Error or Timeout:", e)
+        logger.error("Sarvam TTS error or timeout", extra={"stage": "voice", "error": str(e)})
         # Fallback to a simple placeholder or skip - frontend can use browser TTS
-        return None
\ No newline at end of file
+        return None
+
+# --------------------------------------------------
+# SENTENCE-PARALLEL SYNTHESIS
+# --------------------------------------------------
+_executor = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+_sentence_cache = OrderedDict()
+# Sentence ends, but not after common abbreviations like "Mr."
+SENTENCE_BOUNDARY = re.compile(r"(?<!\bMr\.)(?<!\bMrs\.)(?<!\bMs\.)(?<!\bDr\.)(?<!e\.g\.)(?<!i\.e\.)(?<=[.!?])\s+")
+_cache_lock = threading.Lock()
+
+
+def split_sentences(text):
+    """Split at sentence boundaries, merging very short sentences forward."""
+    parts = [p for p in SENTENCE_BOUNDARY.split(text.strip()) if p]
+    sentences = []
+    carry = ""
+    for part in parts:
+        carry = f"{carry} {part}".strip()
+        if len(carry) >= MIN_SENTENCE_CHARS:
+            sentences.append(carry)
+            carry = ""
+    if carry:
+        sentences.append(carry)
+    return sentences
+
+
+def prefetch(text, on_synthesized=None):
+    """Start synthesizing `text` in the background so a later speak_stream hits the cache."""
+    for sentence in split_sentences(text):
+        _executor.submit(speak_cached, sentence, on_synthesized)
+
+
+def speak_cached(sentence, on_synthesized=None):
+    """
+    speak() with an LRU cache - fixed phrasing (goodbyes etc.) is synthesized once.
+    `on_synthesized(chars, audio_bytes, latency)` is called only when the
+    sentence actually went to the provider, for budget accounting.
+    """
+    with _cache_lock:
+        if sentence in _sentence_cache:
+            _sentence_cache.move_to_end(sentence)
+            return _sentence_cache[sentence]
+
+    started = time.monotonic()
+    audio = speak(sentence)
+
+    if audio:
+        with _cache_lock:
+            _sentence_cache[sentence] = audio
+            while len(_sentence_cache) > SENTENCE_CACHE_SIZE:
+                _sentence_cache.popitem(last=False)
+        if on_synthesized:
+            on_synthesized(len(sentence), len(audio), time.monotonic() - started)
+    return audio
+
+
+# MPEG audio frame header tables (Layer III)
+_BITRATES = {
+    3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],  # MPEG-1
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],      # MPEG-2
+}
+_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+def _strip_id3(audio):
+    if audio[:3] == b"ID3" and len(audio) > 10:
+        size = (audio[6] << 21) | (audio[7] << 14) | (audio[8] << 7) | audio[9]
+        audio = audio[10 + size:]
+    if len(audio) > 128 and audio[-128:-125] == b"TAG":
+        audio = audio[:-128]
+    return audio
+
+
+def _strip_info_frame(audio):
+    """
+    Drop a leading Xing/Info frame. Decoders play it as a short silent frame,
+    which becomes an audible gap between joined sentences.
+    """
+    if len(audio) < 4 or audio[0] != 0xFF or (audio[1] & 0xE0) != 0xE0:
+        return audio
+    version = (audio[1] >> 3) & 0x03
+    bitrate_index = (audio[2] >> 4) & 0x0F
+    rate_index = (audio[2] >> 2) & 0x03
+    if version == 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return audio
+
+    bitrate = _BITRATES[3 if version == 3 else 2][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    padding = (audio[2] >> 1) & 0x01
+    frame_length = (144 if version == 3 else 72) * bitrate // sample_rate + padding
+
+    mono = ((audio[3] >> 6) & 0x03) == 3
+    if version == 3:
+        side_info = 17 if mono else 32
+    else:
+        side_info = 9 if mono else 17
+
+    tag = audio[4 + side_info:8 + side_info]
+    if tag in (b"Xing", b"Info"):
+        return audio[frame_length:]
+    return audio
+
+
+class TTSFailed(Exception):
+    """A sentence could not be synthesized, even after a retry."""
+
+
+def speak_stream(text, lookup=None, on_synthesized=None):
+    """
+    Synthesize `text` sentence by sentence with bounded concurrency and
+    yield MP3 bytes in order, each sentence as soon as it (and everything
+    before it) is ready. `lookup(sentence)` may return pre-synthesized audio.
+    A sentence that fails is retried once; if it fails again TTSFailed is
+    raised rather than skipping it, so the caller can fall back (before the
+    first chunk) or abort the stream. See speak_cached for `on_synthesized`.
+    """
+    sentences = split_sentences(text)
+
+    def synthesize(sentence):
+        audio = lookup(sentence) if lookup else None
+        # Failures aren't cached, so the second speak_cached is a real retry
+        return audio or speak_cached(sentence, on_synthesized) or speak_cached(sentence, on_synthesized)
+
+    pending = []
+    next_index = 0
+    for position in range(len(sentences)):
+        # Keep at most TTS_FANOUT sentences in flight for this request
+        while next_index < len(sentences) and len(pending) < TTS_FANOUT:
+            pending.append(_executor.submit(synthesize, sentences[next_index]))
+            next_index += 1
+
+        audio = pending.pop(0).result()
+        if not audio:
+            for future in pending:
+                future.cancel()
+            raise TTSFailed(f"TTS failed for sentence {position + 1} of {len(sentences)}")
+
+        # The first segment's Xing/Info frame would describe only that
+        # sentence (frame count, duration), so every segment drops it
+        audio = _strip_info_frame(_strip_id3(audio))
+        yield audio